@@ -5,7 +5,7 @@ Pure Playwright + Claude Code CLI orchestrator (with HTML download).
 
 Flow:
   1) Playwright navigates (optionally search)
-  2) Save page "state" (screenshot, state.json, links.json, ax.json, visible_text.txt)
+  2) Save page "state" (state.json, links.json, ax.json, visible_text.txt; screenshot with --screenshots)
   3) Ask Claude (claude -p --output-format json) to decide next action
   4) Execute action (open_url / click / extract / download_html / finish)
   5) Repeat until finish or max steps
@@ -13,6 +13,7 @@ Flow:
 Requirements:
   - Python 3.10+
   - pip install playwright
+  - pip install orjson (optional; faster JSON artifacts)
   - playwright install chromium
   - Claude Code CLI available as `claude` in PATH
 """
@@ -21,18 +22,26 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import hashlib
+import inspect
 import json
 import os
 import re
-import subprocess
 import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 from urllib.parse import quote_plus, urlparse
 
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
+
+# Optional but recommended: C-accelerated JSON for state/artifact serialization
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
 
 
 # ---------------------------
@@ -56,6 +65,34 @@ CLICK_ROLE_ALLOWLIST = {
     "combobox",
 }
 
+# Subresources the agent never reads (it consumes text, links and the DOM only), matched by
+# file extension and blocked inside Chromium via CDP. A context.route() handler would match on
+# resource type instead, but any route disables Chromium's HTTP cache and sends every request,
+# documents and XHR included, through the Playwright driver; on multi-page runs that can cost
+# more than the blocked images save. Extension-less images are therefore still loaded.
+_BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "bmp", "ico", "svg",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "ogg", "mp3", "wav", "m4a",
+)
+BLOCKED_URL_PATTERNS = tuple(
+    pattern for ext in _BLOCKED_EXTENSIONS for pattern in (f"*.{ext}", f"*.{ext}?*")
+)
+
+SCREENSHOT_FILE = "page.jpg"
+
+# How long a link_index click waits for the anchor to become clickable before
+# falling back to a DOM click (hidden / off-screen anchors never do).
+LINK_CLICK_TIMEOUT_MS = 3000
+
+# After a click, how long to wait for a navigation it may have started (JS / async handlers
+# included) and, when none starts, how long to let in-page updates settle.
+CLICK_NAVIGATION_TIMEOUT_MS = 3000
+CLICK_SETTLE_MS = 500
+
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+_JSON_DECODER = json.JSONDecoder()
+
 
 @dataclass
 class AgentConfig:
@@ -66,13 +103,75 @@ class AgentConfig:
     headless: bool
     max_steps: int
     wait_ms: int
-    allowed_domains: List[str]
+    allowed_domains: FrozenSet[str]
+    allowed_suffixes: Tuple[str, ...]
     prompt_path: Path
     claude_cmd: str
     search_engine: str
     max_links: int
     max_text_chars: int
     max_html_bytes: int
+    claude_timeout: Optional[float]
+    block_resources: bool
+    screenshot: bool
+    screenshot_quality: int
+    claude_cache: bool
+
+
+# ---------------------------
+# Playwright instrumentation
+# ---------------------------
+
+class _NoStackInspect:
+    """
+    Stand-in for the `inspect` module whose stack() returns no frames.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(inspect, name)
+
+    @staticmethod
+    def stack(*args: Any, **kwargs: Any) -> List[Any]:
+        return []
+
+
+def _empty_stack_trace() -> Dict[str, Any]:
+    return {"frames": [], "apiName": "", "title": None}
+
+
+def _playwright_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("playwright")
+    except Exception:
+        return "unknown"
+
+
+def disable_playwright_stack_capture() -> None:
+    """
+    playwright-python walks the Python stack on every API call only to enrich error messages.
+    Skip it unless PW_INSPECT_STACK=1 (keep it when debugging).
+
+    This patches playwright._impl._connection internals, which are not a public API.
+    When neither known hook exists on the installed version, it logs and leaves Playwright as is.
+    """
+    if os.environ.get("PW_INSPECT_STACK", "0") != "0":
+        return
+    try:
+        from playwright._impl import _connection
+    except Exception as e:
+        eprint(f"[warn] Playwright stack capture left enabled (cannot import _connection: {e})")
+        return
+    if hasattr(_connection, "_capture_stack_trace"):
+        # Releases that walk frames in a module-level helper.
+        _connection._capture_stack_trace = _empty_stack_trace
+    elif hasattr(_connection, "inspect"):
+        # Releases that call inspect.stack() directly inside wrap_api_call.
+        _connection.inspect = _NoStackInspect()
+    else:
+        eprint(
+            f"[warn] Playwright stack capture left enabled: no known hook in playwright {_playwright_version()}"
+        )
 
 
 # ---------------------------
@@ -91,24 +190,79 @@ def safe_mkdir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def domain_allowed(url: str, allowed: List[str]) -> bool:
-    if not allowed:
+def jdump(obj: Any, *, indent: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes (orjson when available).
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def jloads(data: Any) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_json_file(path: Path, obj: Any, indent: bool) -> None:
+    path.write_bytes(jdump(obj, indent=indent))
+
+
+async def write_json(path: Path, obj: Any, indent: bool = True) -> None:
+    """
+    Serialize and write off the event loop so Playwright keeps pumping messages.
+    """
+    await asyncio.to_thread(_dump_json_file, path, obj, indent)
+
+
+async def write_text_async(path: Path, text: str) -> None:
+    await asyncio.to_thread(path.write_text, text, encoding="utf-8")
+
+
+async def write_bytes_async(path: Path, data: bytes) -> None:
+    await asyncio.to_thread(path.write_bytes, data)
+
+
+def host_allowed(host: str, cfg: AgentConfig) -> bool:
+    """
+    Exact match via the precomputed set, subdomains via one C-level endswith over the suffix tuple.
+    """
+    if not cfg.allowed_domains:
+        return True
+    if not host:
+        return False
+    return host in cfg.allowed_domains or host.endswith(cfg.allowed_suffixes)
+
+
+def domain_allowed(url: str, cfg: AgentConfig) -> bool:
+    if not cfg.allowed_domains:
         return True
     try:
         host = urlparse(url).netloc.lower()
     except Exception:
         return False
-    if not host:
-        return False
-    return any(host == d or host.endswith("." + d) for d in allowed)
+    return host_allowed(host, cfg)
 
 
-def is_http_url(url: str) -> bool:
+def http_host(url: str) -> Optional[str]:
+    """
+    Lowercased netloc of an http(s) URL, or None if the URL is not http(s).
+    """
     try:
         u = urlparse(url)
-        return u.scheme in ("http", "https") and bool(u.netloc)
     except Exception:
-        return False
+        return None
+    if u.scheme not in ("http", "https") or not u.netloc:
+        return None
+    return u.netloc.lower()
+
+
+def allowed_domains_label(cfg: AgentConfig) -> str:
+    return ", ".join(sorted(cfg.allowed_domains)) if cfg.allowed_domains else "(no restriction)"
 
 
 def clamp_text(s: str, n: int) -> str:
@@ -122,7 +276,7 @@ def safe_filename(name: str) -> str:
     Prevent directory traversal and normalize. Force .html extension.
     """
     name = (name or "").strip().replace("\\", "/").split("/")[-1]
-    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
+    name = _SAFE_NAME_RE.sub("_", name).strip("._")
     if not name:
         name = "page.html"
     if not name.lower().endswith(".html"):
@@ -134,51 +288,80 @@ def safe_filename(name: str) -> str:
 # Page State Capture
 # ---------------------------
 
-async def extract_links(page: Page, max_links: int) -> List[Dict[str, str]]:
+async def block_unneeded_resources(context: Any, page: Page) -> None:
+    """Block BLOCKED_URL_PATTERNS for `page` in the browser itself (no request interception)."""
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    await cdp.send("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+
+
+async def capture_dom_bundle(page: Page, max_links: int, max_text_chars: int) -> Dict[str, Any]:
     """
-    Extract visible-ish links (best-effort).
+    Collect links, visible text, title and url in a single page.evaluate round-trip.
+    The newline collapse and truncation (same marker as clamp_text) run in the page.
     """
     js = r"""
-    (maxLinks) => {
+    ([maxLinks, maxChars]) => {
+      // Tag every anchor with its DOM-order index so link_index clicks can target it directly.
       const anchors = Array.from(document.querySelectorAll("a"))
-        .map(a => {
+        .map((a, index) => {
+          a.setAttribute("data-agent-idx", String(index));
           const href = a.href || "";
           const text = (a.innerText || a.textContent || "").trim().replace(/\s+/g, " ");
-          return { href, text };
+          return { index, href, text };
         })
         .filter(x => x.href && x.text);
       const seen = new Set();
-      const uniq = [];
+      const links = [];
       for (const x of anchors) {
         const k = x.href + "||" + x.text;
         if (seen.has(k)) continue;
         seen.add(k);
-        uniq.push(x);
-        if (uniq.length >= maxLinks) break;
+        links.push(x);
+        if (links.length >= maxLinks) break;
       }
-      return uniq;
+      let text = (document.body && document.body.innerText) ? document.body.innerText : "";
+      text = text.replace(/\n{3,}/g, "\n\n").trim();
+      if (text.length > maxChars) text = text.slice(0, maxChars) + "\n...[TRUNCATED]...\n";
+      return { links, text, title: document.title || "", url: location.href };
     }
     """
+    bundle: Dict[str, Any] = {"links": [], "text": "", "title": "", "url": page.url}
     try:
-        links = await page.evaluate(js, max_links)
-        if isinstance(links, list):
-            return [
-                {"href": str(x.get("href", "")), "text": str(x.get("text", ""))}
-                for x in links
-            ]
+        raw = await page.evaluate(js, [max_links, max_text_chars])
     except Exception:
-        pass
-    return []
+        return bundle
+    if not isinstance(raw, dict):
+        return bundle
+    links = raw.get("links")
+    if isinstance(links, list):
+        bundle["links"] = [
+            {"index": int(x.get("index", -1)), "href": str(x.get("href", "")), "text": str(x.get("text", ""))}
+            for x in links
+        ]
+    text = raw.get("text")
+    bundle["text"] = text if isinstance(text, str) else str(text or "")
+    bundle["title"] = str(raw.get("title") or "")
+    bundle["url"] = str(raw.get("url") or page.url)
+    return bundle
 
 
 async def extract_visible_text(page: Page, max_chars: int) -> str:
-    js = r"""() => (document.body && document.body.innerText) ? document.body.innerText : "" """
+    """
+    Clamp inside the page so only max_chars of innerText cross the CDP bridge.
+    """
+    js = r"""
+    (maxChars) => {
+      let t = (document.body && document.body.innerText) ? document.body.innerText : "";
+      t = t.replace(/\n{3,}/g, "\n\n").trim();
+      return t.length > maxChars ? t.slice(0, maxChars) + "\n...[TRUNCATED]...\n" : t;
+    }
+    """
     try:
-        text = await page.evaluate(js)
+        text = await page.evaluate(js, max_chars)
         if not isinstance(text, str):
             text = str(text)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        return clamp_text(text.strip(), max_chars)
+        return text
     except Exception:
         return ""
 
@@ -196,40 +379,64 @@ async def extract_accessibility_snapshot(page: Page) -> Optional[Dict[str, Any]]
     return None
 
 
-async def save_state(step_dir: Path, page: Page, max_links: int, max_text_chars: int) -> Dict[str, Any]:
-    safe_mkdir(step_dir)
-
-    screenshot_path = step_dir / "page.png"
-    try:
-        await page.screenshot(path=str(screenshot_path), full_page=True)
-    except Exception as ex:
-        eprint(f"[warn] screenshot failed: {ex}")
+async def take_screenshot(page: Page, path: Path, quality: int) -> None:
+    """
+    Viewport-only JPEG: far cheaper to lay out, paint and encode than a full-page PNG.
+    """
+    await page.screenshot(path=str(path), type="jpeg", quality=quality, full_page=False)
 
-    links = await extract_links(page, max_links=max_links)
-    (step_dir / "links.json").write_text(json.dumps(links, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    visible_text = await extract_visible_text(page, max_chars=max_text_chars)
-    (step_dir / "visible_text.txt").write_text(visible_text, encoding="utf-8")
+async def save_state(
+    step_dir: Path,
+    page: Page,
+    max_links: int,
+    max_text_chars: int,
+    screenshot_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    screenshot_file is only recorded in the artifacts; the caller takes the screenshot
+    (run_loop overlaps it with the Claude call).
+    """
+    safe_mkdir(step_dir)
 
-    ax = await extract_accessibility_snapshot(page)
+    # The captures are independent; run them concurrently so the step waits for the slowest only.
+    bundle, ax = await asyncio.gather(
+        capture_dom_bundle(page, max_links=max_links, max_text_chars=max_text_chars),
+        extract_accessibility_snapshot(page),
+        return_exceptions=True,
+    )
+    if isinstance(bundle, BaseException):
+        eprint(f"[warn] DOM capture failed: {bundle}")
+        bundle = {"links": [], "text": "", "title": "", "url": page.url}
+    if isinstance(ax, BaseException):
+        ax = None
+
+    links = bundle["links"]
+    visible_text = bundle["text"]
+    # links.json / ax.json are machine-read only, so skip pretty-printing.
+    writes = [
+        write_json(step_dir / "links.json", links, indent=False),
+        write_text_async(step_dir / "visible_text.txt", visible_text),
+    ]
     if ax is not None:
-        (step_dir / "ax.json").write_text(json.dumps(ax, ensure_ascii=False, indent=2), encoding="utf-8")
+        writes.append(write_json(step_dir / "ax.json", ax, indent=False))
+    await asyncio.gather(*writes)
 
     state = {
         "captured_at": now_iso(),
-        "url": page.url,
-        "title": await page.title(),
+        "url": bundle["url"],
+        "title": bundle["title"],
         "links_count": len(links),
         "links_preview": links[: min(10, len(links))],
         "visible_text_preview": visible_text[: min(2000, len(visible_text))],
         "artifacts": {
-            "screenshot": "page.png",
+            "screenshot": screenshot_file,
             "links": "links.json",
             "visible_text": "visible_text.txt",
-            "accessibility": "ax.json" if (step_dir / "ax.json").exists() else None,
+            "accessibility": "ax.json" if ax is not None else None,
         },
     }
-    (step_dir / "state.json").write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    await write_json(step_dir / "state.json", state)
     return state
 
 
@@ -275,33 +482,18 @@ def _extract_first_json_object(s: str) -> Dict[str, Any]:
 
     # Fast path: whole string is JSON
     try:
-        obj = json.loads(s)
+        obj = jloads(s)
         if isinstance(obj, dict):
             return obj
     except Exception:
         pass
 
-    # Fallback: find first {...} by brace matching
+    # Fallback: decode the first JSON value starting at the first '{' (stdlib: orjson has no raw_decode)
     start = s.find("{")
     if start == -1:
         raise ValueError("No '{' found in Claude result text")
 
-    depth = 0
-    end = None
-    for i in range(start, len(s)):
-        c = s[i]
-        if c == "{":
-            depth += 1
-        elif c == "}":
-            depth -= 1
-            if depth == 0:
-                end = i + 1
-                break
-    if end is None:
-        raise ValueError("Unbalanced braces while extracting JSON object")
-
-    chunk = s[start:end]
-    obj = json.loads(chunk)
+    obj, _ = _JSON_DECODER.raw_decode(s, start)
     if not isinstance(obj, dict):
         raise ValueError("Extracted JSON is not an object")
     return obj
@@ -347,24 +539,74 @@ def extract_action_from_claude_output(claude_out: Dict[str, Any]) -> Dict[str, A
 
     raise ValueError("Could not extract action object from Claude output")
 
-def call_claude_json(claude_cmd: str, prompt: str) -> Dict[str, Any]:
+async def call_claude_json(claude_cmd: str, prompt: str, timeout: Optional[float] = None) -> Dict[str, Any]:
     cmd = [claude_cmd, "-p", prompt, "--output-format", "json"]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise RuntimeError(f"Claude CLI timed out after {timeout}s.\ncmd: {' '.join(cmd)}")
     if proc.returncode != 0:
         raise RuntimeError(
             "Claude CLI failed.\n"
             f"cmd: {' '.join(cmd)}\n"
-            f"stdout:\n{proc.stdout}\n"
-            f"stderr:\n{proc.stderr}\n"
+            f"stdout:\n{out.decode('utf-8', errors='replace')}\n"
+            f"stderr:\n{err.decode('utf-8', errors='replace')}\n"
         )
     try:
-        data = json.loads(proc.stdout)
+        data = jloads(out)
     except Exception as ex:
-        raise RuntimeError(f"Failed to parse Claude JSON output: {ex}\nRaw:\n{proc.stdout}") from ex
+        raise RuntimeError(
+            f"Failed to parse Claude JSON output: {ex}\nRaw:\n{out.decode('utf-8', errors='replace')}"
+        ) from ex
     return data
 
 
-def validate_action(action: Dict[str, Any], allowed_domains: List[str]) -> Tuple[bool, str]:
+def _prompt_key(prompt: str) -> str:
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+
+async def call_claude_json_cached(
+    claude_cmd: str,
+    prompt: str,
+    timeout: Optional[float] = None,
+    cache_dir: Optional[Path] = None,
+) -> Tuple[Dict[str, Any], Optional[Path]]:
+    """
+    call_claude_json with an on-disk cache keyed by the prompt hash (skipped when cache_dir is None).
+    Returns (response, cache_path). cache_path is set only for a fresh response; the caller stores
+    it there with store_claude_cache() once the action has parsed and validated.
+    """
+    if cache_dir is None:
+        return await call_claude_json(claude_cmd, prompt, timeout=timeout), None
+
+    cache_path = cache_dir / f"{_prompt_key(prompt)}.json"
+    if cache_path.exists():
+        try:
+            data = jloads(await asyncio.to_thread(cache_path.read_bytes))
+            if isinstance(data, dict):
+                eprint(f"[cache] Claude response reused: {cache_path.name}")
+                return data, None
+        except Exception as ex:
+            eprint(f"[warn] ignoring unreadable Claude cache entry {cache_path}: {ex}")
+
+    return await call_claude_json(claude_cmd, prompt, timeout=timeout), cache_path
+
+
+async def store_claude_cache(cache_path: Optional[Path], data: Dict[str, Any]) -> None:
+    if cache_path is None:
+        return
+    safe_mkdir(cache_path.parent)
+    await write_json(cache_path, data, indent=False)
+
+
+def validate_action(action: Dict[str, Any], cfg: AgentConfig) -> Tuple[bool, str]:
     if not isinstance(action, dict):
         return False, "action is not a JSON object"
     t = action.get("action")
@@ -375,9 +617,10 @@ def validate_action(action: Dict[str, Any], allowed_domains: List[str]) -> Tuple
 
     if t == "open_url":
         url = action.get("url")
-        if not isinstance(url, str) or not is_http_url(url):
+        host = http_host(url) if isinstance(url, str) else None
+        if host is None:
             return False, "open_url requires valid http(s) url"
-        if not domain_allowed(url, allowed_domains):
+        if not host_allowed(host, cfg):
             return False, f"url domain not allowed: {url}"
 
     if t == "click":
@@ -399,9 +642,10 @@ def validate_action(action: Dict[str, Any], allowed_domains: List[str]) -> Tuple
 
     if t == "download_html":
         url = action.get("url")
-        if not isinstance(url, str) or not is_http_url(url):
+        host = http_host(url) if isinstance(url, str) else None
+        if host is None:
             return False, "download_html requires valid http(s) url"
-        if not domain_allowed(url, allowed_domains):
+        if not host_allowed(host, cfg):
             return False, f"url domain not allowed: {url}"
         output = action.get("output")
         if not isinstance(output, str) or not output.strip():
@@ -425,13 +669,30 @@ def validate_action(action: Dict[str, Any], allowed_domains: List[str]) -> Tuple
 # Action Execution
 # ---------------------------
 
+async def smart_wait(page: Page, max_ms: int) -> None:
+    """
+    Wait for the page to settle, using max_ms as a ceiling rather than a fixed sleep:
+    returns as soon as DOMContentLoaded and load have fired.
+    """
+    if max_ms <= 0:
+        return
+    deadline = time.monotonic() + max_ms / 1000
+    for state in ("domcontentloaded", "load"):
+        remaining_ms = (deadline - time.monotonic()) * 1000
+        if remaining_ms <= 0:
+            return
+        try:
+            await page.wait_for_load_state(state, timeout=remaining_ms)
+        except PlaywrightTimeoutError:
+            return
+
+
 async def do_open_url(page: Page, url: str, wait_ms: int) -> None:
     await page.goto(url, wait_until="domcontentloaded")
-    if wait_ms > 0:
-        await page.wait_for_timeout(wait_ms)
+    await smart_wait(page, wait_ms)
 
 
-async def do_click(page: Page, action: Dict[str, Any], wait_ms: int) -> None:
+async def _click_target(page: Page, action: Dict[str, Any]) -> None:
     role = action.get("role")
     name = action.get("name")
     selector = action.get("selector")
@@ -443,27 +704,40 @@ async def do_click(page: Page, action: Dict[str, Any], wait_ms: int) -> None:
     elif isinstance(selector, str) and selector.strip():
         await page.locator(selector).first.click()
     elif isinstance(link_index, int) and link_index >= 0:
-        js = r"""
-        (idx) => {
-          const as = Array.from(document.querySelectorAll("a"));
-          if (idx < 0 || idx >= as.length) return false;
-          as[idx].scrollIntoView({behavior: "instant", block: "center", inline: "center"});
-          as[idx].click();
-          return true;
-        }
-        """
-        ok = await page.evaluate(js, link_index)
-        if not ok:
+        # Anchors were tagged with data-agent-idx during state capture.
+        locator = page.locator(f'a[data-agent-idx="{link_index}"]')
+        if await locator.count() == 0:
             raise RuntimeError(f"link_index out of range or click failed: {link_index}")
+        try:
+            await locator.first.click(timeout=LINK_CLICK_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            # Hidden or off-screen anchors: click through the DOM as before.
+            await locator.first.evaluate(
+                """(a) => {
+                  a.scrollIntoView({behavior: "instant", block: "center", inline: "center"});
+                  a.click();
+                }"""
+            )
     else:
         raise RuntimeError("Invalid click action (no role+name/selector/link_index)")
 
-    if wait_ms > 0:
-        await page.wait_for_timeout(wait_ms)
+
+async def do_click(page: Page, action: Dict[str, Any], wait_ms: int) -> None:
+    # wait_for_load_state returns at once on the already-loaded document, so catch the
+    # navigation the click starts (if any) before waiting for it to load.
+    clicked = False
     try:
-        await page.wait_for_load_state("domcontentloaded", timeout=5000)
-    except Exception:
-        pass
+        async with page.expect_navigation(wait_until="commit", timeout=CLICK_NAVIGATION_TIMEOUT_MS):
+            await _click_target(page, action)
+            clicked = True
+    except PlaywrightTimeoutError:
+        if not clicked:
+            raise
+        # No navigation: the click only changed the current page.
+        await page.wait_for_timeout(CLICK_SETTLE_MS)
+        return
+
+    await smart_wait(page, max(wait_ms, 5000))
 
 
 async def do_extract(page: Page, action: Dict[str, Any], step_dir: Path, max_text_chars: int) -> None:
@@ -481,20 +755,35 @@ async def do_extract(page: Page, action: Dict[str, Any], step_dir: Path, max_tex
     }
 
     if selectors:
-        for sel in selectors:
-            if not isinstance(sel, str) or not sel.strip():
-                continue
-            try:
-                txt = await page.locator(sel).first.inner_text()
-            except Exception:
-                txt = ""
-            extracted["items"].append({"selector": sel, "text": clamp_text((txt or "").strip(), max_text_chars)})
+        sels = [sel for sel in selectors if isinstance(sel, str) and sel.strip()]
+        # One round-trip for all selectors instead of one inner_text() call each.
+        js = r"""
+        (sels) => sels.map(s => {
+          try {
+            const el = document.querySelector(s);
+            return el ? (el.innerText || el.textContent || "") : "";
+          } catch (e) {
+            return "";
+          }
+        })
+        """
+        try:
+            texts = await page.evaluate(js, sels)
+        except Exception:
+            texts = []
+        if not isinstance(texts, list) or len(texts) != len(sels):
+            texts = [""] * len(sels)
+        for sel, txt in zip(sels, texts):
+            txt = txt if isinstance(txt, str) else ""
+            extracted["items"].append({"selector": sel, "text": clamp_text(txt.strip(), max_text_chars)})
     else:
         extracted["items"].append({"selector": "BODY_INNER_TEXT", "text": await extract_visible_text(page, max_text_chars)})
 
-    (step_dir / "extracted.json").write_text(json.dumps(extracted, ensure_ascii=False, indent=2), encoding="utf-8")
     all_text = "\n\n".join([f"[{i.get('selector')}]\n{i.get('text','')}" for i in extracted["items"]])
-    (step_dir / "extracted.txt").write_text(all_text, encoding="utf-8")
+    await asyncio.gather(
+        write_json(step_dir / "extracted.json", extracted),
+        write_text_async(step_dir / "extracted.txt", all_text),
+    )
 
 
 async def do_download_html(page: Page, action: Dict[str, Any], step_dir: Path, wait_ms: int, max_html_bytes: int) -> None:
@@ -511,35 +800,39 @@ async def do_download_html(page: Page, action: Dict[str, Any], step_dir: Path, w
 
     if mode == "dom":
         await page.goto(url, wait_until="domcontentloaded")
-        if wait_ms > 0:
-            await page.wait_for_timeout(wait_ms)
+        await smart_wait(page, wait_ms)
         html = await page.content()
+        b = await asyncio.to_thread(html.encode, "utf-8", "ignore")
+        del html
     else:
         resp = await page.context.request.get(url)
         ct = (resp.headers.get("content-type") or "").lower()
         if ("text/html" not in ct) and ("application/xhtml" not in ct):
             raise RuntimeError(f"download_html(response) expected HTML but got content-type={ct}")
-        html = await resp.text()
+        # Fail fast on a declared oversize body before pulling it into Python.
+        try:
+            declared = int(resp.headers.get("content-length") or 0)
+        except ValueError:
+            declared = 0
+        if declared > max_html_bytes:
+            raise RuntimeError(f"HTML too large (>{max_html_bytes} bytes). Refuse to save.")
+        # Raw bytes as served (original charset); no str round-trip.
+        b = await resp.body()
 
-    b = html.encode("utf-8", errors="ignore")
     if len(b) > max_html_bytes:
         raise RuntimeError(f"HTML too large (>{max_html_bytes} bytes). Refuse to save.")
 
-    out_path.write_bytes(b)
-    (step_dir / "download_html.json").write_text(
-        json.dumps(
-            {
-                "saved_at": now_iso(),
-                "url": url,
-                "mode": mode,
-                "file": out_name,
-                "bytes": len(b),
-                "path": str(out_path.resolve()),
-            },
-            ensure_ascii=False,
-            indent=2,
-        ),
-        encoding="utf-8",
+    await write_bytes_async(out_path, b)
+    await write_json(
+        step_dir / "download_html.json",
+        {
+            "saved_at": now_iso(),
+            "url": url,
+            "mode": mode,
+            "file": out_name,
+            "bytes": len(b),
+            "path": str(out_path.resolve()),
+        },
     )
 
 
@@ -547,16 +840,19 @@ async def do_download_html(page: Page, action: Dict[str, Any], step_dir: Path, w
 # Search URL
 # ---------------------------
 
+_ENGINE_URLS = {
+    "duckduckgo": "https://duckduckgo.com/html/?q={}",
+    "ddg": "https://duckduckgo.com/html/?q={}",
+    "google": "https://www.google.com/search?q={}",
+    "bing": "https://www.bing.com/search?q={}",
+}
+
+
 def build_search_url(engine: str, query: str) -> str:
-    q = quote_plus(query)
-    e = engine.lower()
-    if e in ("ddg", "duckduckgo"):
-        return f"https://duckduckgo.com/html/?q={q}"
-    if e in ("google",):
-        return f"https://www.google.com/search?q={q}"
-    if e in ("bing",):
-        return f"https://www.bing.com/search?q={q}"
-    return f"https://duckduckgo.com/html/?q={q}"
+    """
+    engine is expected lowercased (parse_args normalizes it); unknown engines fall back to DuckDuckGo.
+    """
+    return _ENGINE_URLS.get(engine, _ENGINE_URLS["duckduckgo"]).format(quote_plus(query))
 
 
 # ---------------------------
@@ -565,50 +861,100 @@ def build_search_url(engine: str, query: str) -> str:
 
 async def run_loop(cfg: AgentConfig) -> None:
     safe_mkdir(cfg.out_dir)
-    template = load_prompt_template(cfg.prompt_path)
+    # Substitute the run-constant placeholders once; each step only fills the per-step ones.
+    template = render_prompt(
+        load_prompt_template(cfg.prompt_path),
+        {
+            "GOAL": cfg.goal,
+            "ALLOWED_DOMAINS": allowed_domains_label(cfg),
+            "SEARCH_ENGINE": cfg.search_engine,
+        },
+    )
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=cfg.headless)
         context = await browser.new_context()
         page = await context.new_page()
+        if cfg.block_resources:
+            await block_unneeded_resources(context, page)
 
         # Initial navigation
         if cfg.start_url:
-            if not is_http_url(cfg.start_url):
+            start_host = http_host(cfg.start_url)
+            if start_host is None:
                 raise ValueError(f"Invalid --start-url: {cfg.start_url}")
-            if not domain_allowed(cfg.start_url, cfg.allowed_domains):
+            if not host_allowed(start_host, cfg):
                 raise ValueError(f"Start URL not allowed by --allowed-domains: {cfg.start_url}")
             await do_open_url(page, cfg.start_url, cfg.wait_ms)
         elif cfg.query:
             search_url = build_search_url(cfg.search_engine, cfg.query)
-            if not domain_allowed(search_url, cfg.allowed_domains):
+            if not domain_allowed(search_url, cfg):
                 raise ValueError(
                     f"Search engine URL is not allowed by --allowed-domains.\n"
                     f"search_url={search_url}\n"
-                    f"allowed={cfg.allowed_domains}\n"
+                    f"allowed={allowed_domains_label(cfg)}\n"
                     f"Either add the search domain or omit --allowed-domains."
                 )
             await do_open_url(page, search_url, cfg.wait_ms)
 
+        # Resolve once; per-step hint paths are plain string joins (no stat per hint).
+        out_root = str(cfg.out_dir.resolve())
+        cache_dir = cfg.out_dir / ".claude_cache" if cfg.claude_cache else None
+
         for step in range(cfg.max_steps):
-            step_dir = cfg.out_dir / f"step_{step:02d}"
-            state = await save_state(step_dir, page, cfg.max_links, cfg.max_text_chars)
+            step_name = f"step_{step:02d}"
+            step_dir = cfg.out_dir / step_name
+            step_prefix = f"{out_root}{os.sep}{step_name}{os.sep}"
+            screenshot_task = None
+            if cfg.screenshot:
+                safe_mkdir(step_dir)
+                screenshot_task = asyncio.create_task(
+                    take_screenshot(page, step_dir / SCREENSHOT_FILE, cfg.screenshot_quality)
+                )
+            state = await save_state(
+                step_dir,
+                page,
+                cfg.max_links,
+                cfg.max_text_chars,
+                screenshot_file=SCREENSHOT_FILE if cfg.screenshot else None,
+            )
 
             prompt = render_prompt(
                 template,
                 {
-                    "GOAL": cfg.goal,
-                    "ALLOWED_DOMAINS": ", ".join(cfg.allowed_domains) if cfg.allowed_domains else "(no restriction)",
                     "STEP": str(step),
-                    "STATE_JSON": json.dumps(state, ensure_ascii=False, indent=2),
-                    "HINT_LINKS_JSON_PATH": str((step_dir / "links.json").resolve()),
-                    "HINT_SCREENSHOT_PATH": str((step_dir / "page.png").resolve()),
-                    "HINT_VISIBLE_TEXT_PATH": str((step_dir / "visible_text.txt").resolve()),
-                    "SEARCH_ENGINE": cfg.search_engine,
+                    # captured_at is left out so identical pages render identical (cacheable) prompts.
+                    "STATE_JSON": jdump(
+                        {k: v for k, v in state.items() if k != "captured_at"}, indent=True
+                    ).decode("utf-8"),
+                    "HINT_LINKS_JSON_PATH": step_prefix + "links.json",
+                    "HINT_SCREENSHOT_PATH": (
+                        step_prefix + SCREENSHOT_FILE if state["artifacts"]["screenshot"] else "(disabled)"
+                    ),
+                    "HINT_VISIBLE_TEXT_PATH": step_prefix + "visible_text.txt",
                 },
             )
 
-            claude_out = call_claude_json(cfg.claude_cmd, prompt)
+            claude_call = call_claude_json_cached(
+                cfg.claude_cmd,
+                prompt,
+                timeout=cfg.claude_timeout,
+                cache_dir=cache_dir,
+            )
+            if screenshot_task is None:
+                claude_out, cache_path = await claude_call
+            else:
+                # Hide screenshot encoding behind the Claude round-trip; both finish before the next action.
+                screenshot_res, claude_res = await asyncio.gather(
+                    screenshot_task, claude_call, return_exceptions=True
+                )
+                if isinstance(screenshot_res, BaseException):
+                    eprint(f"[warn] screenshot failed: {screenshot_res}")
+                    state["artifacts"]["screenshot"] = None
+                    await write_json(step_dir / "state.json", state)
+                if isinstance(claude_res, BaseException):
+                    raise claude_res
+                claude_out, cache_path = claude_res
 
             try:
                 action_obj = extract_action_from_claude_output(claude_out)
@@ -619,22 +965,22 @@ async def run_loop(cfg: AgentConfig) -> None:
                     + f"\n\nParser error: {ex}"
                 ) from ex
 
-            (step_dir / "claude_action.json").write_text(
-                json.dumps(action_obj, ensure_ascii=False, indent=2), encoding="utf-8"
-            )
+            await write_json(step_dir / "claude_action.json", action_obj)
 
-            ok, msg = validate_action(action_obj, cfg.allowed_domains)
+            ok, msg = validate_action(action_obj, cfg)
             if not ok:
                 raise RuntimeError(f"Claude returned invalid action: {msg}\n{json.dumps(action_obj, ensure_ascii=False, indent=2)}")
+            # Only responses that parsed and validated are cached, so a bad one is never replayed.
+            await store_claude_cache(cache_path, claude_out)
 
             action_type = action_obj["action"]
             eprint(f"[step {step}] action={action_type} reason={action_obj.get('reason','')[:120]}")
 
             if action_type == "finish":
-                (cfg.out_dir / "FINISHED.txt").write_text(
+                await write_text_async(
+                    cfg.out_dir / "FINISHED.txt",
                     f"Finished at {now_iso()}\nReason: {action_obj.get('reason','')}\n"
                     f"Result: {action_obj.get('result','')}\n",
-                    encoding="utf-8",
                 )
                 break
 
@@ -653,11 +999,11 @@ async def run_loop(cfg: AgentConfig) -> None:
             elif action_type == "search":
                 query = action_obj["query"]
                 search_url = build_search_url(cfg.search_engine, query)
-                if not domain_allowed(search_url, cfg.allowed_domains):
+                if not domain_allowed(search_url, cfg):
                     raise RuntimeError(
                         f"Search engine URL is not allowed by --allowed-domains.\n"
                         f"search_url={search_url}\n"
-                        f"allowed={cfg.allowed_domains}\n"
+                        f"allowed={allowed_domains_label(cfg)}\n"
                         f"Either add the search domain or omit --allowed-domains."
                     )
                 await do_open_url(page, search_url, cfg.wait_ms)
@@ -677,7 +1023,7 @@ def parse_args() -> AgentConfig:
     ap.add_argument("--out-dir", default="out", help="Output directory for states/artifacts.")
     ap.add_argument("--headless", action="store_true", help="Run browser headless.")
     ap.add_argument("--max-steps", type=int, default=12, help="Max decision steps.")
-    ap.add_argument("--wait-ms", type=int, default=700, help="Wait after actions (ms).")
+    ap.add_argument("--wait-ms", type=int, default=700, help="Max wait for the page to settle after actions (ms).")
     ap.add_argument("--allowed-domains", default="", help="Comma-separated allowlist of domains. Empty=allow all.")
     ap.add_argument("--prompt", default="prompts/navigator.md", help="Navigator prompt template path.")
     ap.add_argument("--claude-cmd", default=os.environ.get("CLAUDE_CMD", "claude"), help="Claude CLI command.")
@@ -685,10 +1031,34 @@ def parse_args() -> AgentConfig:
     ap.add_argument("--max-links", type=int, default=25, help="Max links to extract each step.")
     ap.add_argument("--max-text-chars", type=int, default=20000, help="Max chars of visible text to save.")
     ap.add_argument("--max-html-bytes", type=int, default=5 * 1024 * 1024, help="Max HTML bytes to save (default 5MB).")
+    ap.add_argument(
+        "--screenshots",
+        action="store_true",
+        help="Save a viewport JPEG screenshot each step (off by default). Also loads images/fonts.",
+    )
+    ap.add_argument("--screenshot-quality", type=int, default=60, help="JPEG quality for --screenshots (0-100).")
+    ap.add_argument(
+        "--no-block-resources",
+        action="store_true",
+        help=(
+            "Load images/media/fonts even without --screenshots "
+            "(blocking is by URL extension, so the browser HTTP cache stays enabled)."
+        ),
+    )
+    ap.add_argument(
+        "--claude-cache",
+        action="store_true",
+        help=(
+            "Reuse valid Claude responses cached under <out-dir>/.claude_cache by prompt hash. "
+            "The prompt includes the step number and step paths, so this only helps exact re-runs "
+            "of the same task into the same --out-dir."
+        ),
+    )
+    ap.add_argument("--claude-timeout", type=float, default=600.0, help="Seconds to wait for one Claude CLI call (0=no limit).")
 
     ns = ap.parse_args()
 
-    allowed = [d.strip().lower() for d in ns.allowed_domains.split(",") if d.strip()]
+    allowed = frozenset(d.strip().lower() for d in ns.allowed_domains.split(",") if d.strip())
     return AgentConfig(
         goal=ns.goal,
         query=ns.query,
@@ -698,17 +1068,24 @@ def parse_args() -> AgentConfig:
         max_steps=int(ns.max_steps),
         wait_ms=int(ns.wait_ms),
         allowed_domains=allowed,
+        allowed_suffixes=tuple("." + d for d in sorted(allowed)),
         prompt_path=Path(ns.prompt),
         claude_cmd=str(ns.claude_cmd),
-        search_engine=str(ns.search_engine),
+        search_engine=str(ns.search_engine).lower(),
         max_links=int(ns.max_links),
         max_text_chars=int(ns.max_text_chars),
         max_html_bytes=int(ns.max_html_bytes),
+        claude_timeout=float(ns.claude_timeout) if ns.claude_timeout > 0 else None,
+        block_resources=not (ns.no_block_resources or ns.screenshots),
+        screenshot=bool(ns.screenshots),
+        screenshot_quality=max(0, min(100, int(ns.screenshot_quality))),
+        claude_cache=bool(ns.claude_cache),
     )
 
 
 def main() -> None:
     cfg = parse_args()
+    disable_playwright_stack_capture()
     asyncio.run(run_loop(cfg))
 
 
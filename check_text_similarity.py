@@ -1,67 +1,166 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+import hashlib
 import os
 import re
 import sys
 import unicodedata
-import zlib
-from difflib import SequenceMatcher
+from functools import lru_cache
 
-try:
-    from rapidfuzz import fuzz as rapidfuzz_fuzz
-except Exception:
-    rapidfuzz_fuzz = None
+import numpy as np
+from rapidfuzz import fuzz as rapidfuzz_fuzz
+from rapidfuzz.process import cpdist as rapidfuzz_cpdist
+
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_TABLE = str.maketrans("", "", "、。・,.;:!?「」『』（）()［］[]{}<>")
 
 
 def normalize_text(text, strip_punct=False):
     if text is None:
         return ""
     value = unicodedata.normalize("NFKC", text)
-    value = value.replace("\r\n", "\n").replace("\r", "\n")
-    value = re.sub(r"\s+", " ", value).strip()
+    # \s+ already folds CR/LF into the single space.
+    value = _WS_RE.sub(" ", value).strip()
     if strip_punct:
-        value = re.sub(r"[、。・,.;:!?「」『』（）()［］\[\]{}<>]", "", value)
+        value = value.translate(_PUNCT_TABLE)
     return value
 
 
-def adler32_hash(value):
-    return zlib.adler32(value.encode("utf-8")) & 0xFFFFFFFF
+# Largest prime below 2**32: base hashes and permutation parameters stay below it,
+# so a * h + b fits in uint64 without overflow.
+HASH_PRIME = 4294967291
+NGRAM_BASE = 1000003
+PERMUTATION_SEED = 20240601
+
+
+@lru_cache(maxsize=None)
+def permutation_params(signature_size):
+    """Fixed (a, b) pairs of the universal hash family shared by every text."""
+    rng = np.random.default_rng(PERMUTATION_SEED)
+    a = rng.integers(1, HASH_PRIME, size=signature_size, dtype=np.uint64)
+    b = rng.integers(0, HASH_PRIME, size=signature_size, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+@lru_cache(maxsize=None)
+def ngram_powers(ngram_size):
+    powers = np.empty(ngram_size, dtype=np.uint64)
+    value = 1
+    for i in range(ngram_size - 1, -1, -1):
+        powers[i] = value
+        value = value * NGRAM_BASE % HASH_PRIME
+    return powers
+
 
+def ngram_hashes(text, ngram_size):
+    """Polynomial hash of every character n-gram, computed on a code-point array."""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    size = min(ngram_size, len(codes))
+    windows = np.lib.stride_tricks.sliding_window_view(codes, size)
+    # code points < 2**21 and powers < 2**32, so each row sum stays far below 2**64.
+    return (windows * ngram_powers(size)).sum(axis=1) % np.uint64(HASH_PRIME)
 
-def minhash_signature(text, ngram_size, signature_size):
+
+def minhash_signature(text, ngram_size, signature_size, out=None):
+    """MinHash values of `text`; written into the uint32 row `out` when given."""
+    if out is None:
+        out = np.empty(signature_size, dtype=np.uint32)
     if not text:
-        return [0] * signature_size
-    if len(text) < ngram_size:
-        return [adler32_hash(text)] * signature_size
-    grams = {text[i : i + ngram_size] for i in range(len(text) - ngram_size + 1)}
-    hashes = sorted(adler32_hash(g) for g in grams)
-    if not hashes:
-        return [0] * signature_size
-    if len(hashes) < signature_size:
-        repeats = (signature_size + len(hashes) - 1) // len(hashes)
-        hashes = (hashes * repeats)[:signature_size]
-        return hashes
-    return hashes[:signature_size]
-
-
-def similarity_ratio(a, b):
-    if rapidfuzz_fuzz is not None:
-        return rapidfuzz_fuzz.ratio(a, b) / 100.0
-    return SequenceMatcher(None, a, b).ratio()
-
-
-def load_rows(path, encoding=None):
+        out[:] = 0
+        return out
+    base = ngram_hashes(text, ngram_size)
+    a, b = permutation_params(signature_size)
+    permuted = (a * base[None, :] + b) % np.uint64(HASH_PRIME)
+    # Every value is below HASH_PRIME < 2**32.
+    out[:] = permuted.min(axis=1)
+    return out
+
+
+def score_pairs(normalized, pairs_a, pairs_b, threshold, workers=-1):
+    """Similarity (0-1) of each candidate pair; pairs below threshold may score 0."""
+    # One batched call: bit-parallel kernel across pairs, split over `workers`
+    # native threads without the GIL (-1 uses every core).
+    scores = rapidfuzz_cpdist(
+        [normalized[idx] for idx in pairs_a],
+        [normalized[idx] for idx in pairs_b],
+        scorer=rapidfuzz_fuzz.ratio,
+        score_cutoff=threshold * 100.0,
+        dtype=np.float64,
+        workers=workers,
+    )
+    return (scores / 100.0).tolist()
+
+
+def text_digest64(value):
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def find_exact_groups(normalized):
+    """Row indexes sharing identical non-empty normalized text (groups of 2+).
+
+    Rows are grouped by 64-bit digest with np.unique (inverse + counts), and
+    only digests seen two or more times are materialized. Groups are returned
+    in order of first occurrence with ascending indexes.
+    """
+    digests = np.fromiter(
+        (text_digest64(norm) if norm else 0 for norm in normalized),
+        dtype=np.uint64,
+        count=len(normalized),
+    )
+    _, inverse, counts = np.unique(digests, return_inverse=True, return_counts=True)
+    # Stable sort by group code keeps each group's rows in ascending order.
+    order = np.argsort(inverse, kind="stable")
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    groups = []
+    for code in np.flatnonzero(counts >= 2).tolist():
+        run = order[starts[code] : ends[code]].tolist()
+        if not normalized[run[0]]:
+            run = [idx for idx in run if normalized[idx]]
+            if len(run) < 2:
+                continue
+        # Collision guard: split the run by actual text (normally a single group).
+        by_text = {}
+        for idx in run:
+            by_text.setdefault(normalized[idx], []).append(idx)
+        groups.extend(idxs for idxs in by_text.values() if len(idxs) >= 2)
+    groups.sort(key=lambda idxs: idxs[0])
+    return groups
+
+
+META_COLUMNS = ("制定年", "自治体", "区分")
+
+
+def load_rows(path, column, encoding=None):
+    """Read (line_no, text, 制定年, 自治体, 区分) tuples; absent columns read as ""."""
     encodings = [encoding] if encoding else ["utf-8-sig", "utf-8", "cp932"]
     last_error = None
     for enc in encodings:
         try:
             with open(path, "r", encoding=enc, newline="") as handle:
-                reader = csv.DictReader(handle)
+                reader = csv.reader(handle)
+                header = next(reader, None)
+                while header == []:
+                    header = next(reader, None)
+                if header is None or column not in header:
+                    return header, [], enc
+                col_idx = [
+                    header.index(name) if name in header else None
+                    for name in (column,) + META_COLUMNS
+                ]
                 rows = []
-                for line_no, row in enumerate(reader, start=2):
-                    rows.append((line_no, row))
-                return reader.fieldnames, rows, enc
+                # Blank lines are skipped without advancing line_no, as DictReader did.
+                for line_no, row in enumerate((r for r in reader if r), start=2):
+                    width = len(row)
+                    rows.append(
+                        (line_no,)
+                        + tuple(row[i] if i is not None and i < width else "" for i in col_idx)
+                    )
+                return header, rows, enc
         except UnicodeDecodeError as exc:
             last_error = exc
     raise last_error
@@ -75,17 +174,58 @@ def truncate_text(text, max_len):
     return text[:max_len] + "..."
 
 
+# Large write buffer so csv rows reach the OS in few, big writes.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+FNV_OFFSET = np.uint64(14695981039346656037)
+FNV_PRIME = np.uint64(1099511628211)
+
+
 def build_buckets(signatures, lengths, band_size, length_bucket):
-    buckets = {}
-    for idx, sig in enumerate(signatures):
-        bucket = lengths[idx] // length_bucket if length_bucket else 0
-        for offset in range(0, len(sig), band_size):
-            band = sig[offset : offset + band_size]
-            if len(band) < band_size:
-                continue
-            key = (bucket, offset, tuple(band))
-            buckets.setdefault(key, []).append(idx)
-    return buckets
+    """Group rows sharing (length bucket, band offset, band values).
+
+    Each band is FNV-folded into one uint64 key with column-wise NumPy ops,
+    then rows are grouped by a stable argsort over the keys. Returns the
+    groups with two or more rows, in first-occurrence order, each listing
+    row indexes in ascending order.
+    """
+    sigs = np.asarray(signatures, dtype=np.uint32)
+    if sigs.ndim != 2 or sigs.shape[0] == 0 or band_size <= 0:
+        return []
+    n_rows, sig_size = sigs.shape
+    n_bands = sig_size // band_size
+    if n_bands == 0:
+        return []
+
+    if length_bucket:
+        bucket_ids = np.asarray(lengths, dtype=np.uint64) // np.uint64(length_bucket)
+    else:
+        bucket_ids = np.zeros(n_rows, dtype=np.uint64)
+
+    keys = np.empty((n_rows, n_bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for band in range(n_bands):
+            offset = band * band_size
+            h = (FNV_OFFSET ^ bucket_ids) * FNV_PRIME
+            h = (h ^ np.uint64(offset)) * FNV_PRIME
+            for col in range(offset, offset + band_size):
+                h = (h ^ sigs[:, col].astype(np.uint64)) * FNV_PRIME
+            keys[:, band] = h
+
+    flat = keys.ravel()
+    order = np.argsort(flat, kind="stable")
+    sorted_keys = flat[order]
+    bounds = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [flat.size]))
+    multi = (ends - starts) >= 2
+    starts = starts[multi]
+    ends = ends[multi]
+    rows = order // n_bands
+    # Stable sort keeps flat (row-major) order inside a group, so order[start]
+    # is where the group first appears.
+    group_order = np.argsort(order[starts], kind="stable")
+    return [rows[starts[g] : ends[g]].tolist() for g in group_order]
 
 
 def parse_args():
@@ -125,14 +265,17 @@ def parse_args():
     parser.add_argument(
         "--sig-size",
         type=int,
-        default=12,
+        default=64,
         help="Number of minhash values per signature.",
     )
     parser.add_argument(
         "--band-size",
         type=int,
-        default=4,
-        help="Band size for LSH-style bucketing.",
+        default=3,
+        help=(
+            "Band size for LSH-style bucketing. With --sig-size this sets recall: "
+            "sig-size/band-size bands of band-size rows each."
+        ),
     )
     parser.add_argument(
         "--length-bucket",
@@ -162,6 +305,12 @@ def parse_args():
         action="store_true",
         help="Include identical texts in similarity output.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=-1,
+        help="Threads for similarity scoring (-1 for all cores).",
+    )
     return parser.parse_args()
 
 
@@ -169,7 +318,7 @@ def main():
     args = parse_args()
     os.makedirs(args.output_dir, exist_ok=True)
 
-    fieldnames, rows, encoding = load_rows(args.csv_path, args.encoding)
+    fieldnames, rows, encoding = load_rows(args.csv_path, args.column, args.encoding)
     if fieldnames is None or args.column not in fieldnames:
         print(f"Missing column: {args.column}", file=sys.stderr)
         sys.exit(1)
@@ -181,25 +330,27 @@ def main():
     years = []
     municipalities = []
     categories = []
-    for line_no, row in rows:
-        raw_text = row.get(args.column, "")
-        norm = normalize_text(raw_text, strip_punct=args.strip_punct)
+    # Boilerplate bodies repeat across rows; normalize each distinct one once.
+    normalize_cache = {}
+    for line_no, raw_text, year, municipality, category in rows:
+        norm = normalize_cache.get(raw_text)
+        if norm is None:
+            norm = normalize_text(raw_text, strip_punct=args.strip_punct)
+            normalize_cache[raw_text] = norm
         texts.append(raw_text)
         normalized.append(norm)
         lengths.append(len(norm))
         row_nums.append(line_no)
-        years.append(row.get("制定年", ""))
-        municipalities.append(row.get("自治体", ""))
-        categories.append(row.get("区分", ""))
+        years.append(year)
+        municipalities.append(municipality)
+        categories.append(category)
 
-    exact_map = {}
-    for idx, norm in enumerate(normalized):
-        if not norm:
-            continue
-        exact_map.setdefault(norm, []).append(idx)
+    exact_groups = find_exact_groups(normalized)
 
     exact_path = os.path.join(args.output_dir, "exact_duplicates.csv")
-    with open(exact_path, "w", encoding="utf-8", newline="") as handle:
+    with open(
+        exact_path, "w", encoding="utf-8", newline="", buffering=OUTPUT_BUFFER_SIZE
+    ) as handle:
         writer = csv.writer(handle)
         writer.writerow(
             [
@@ -213,37 +364,78 @@ def main():
                 "count_in_group",
             ]
         )
-        group_id = 0
-        for norm_text, idxs in exact_map.items():
-            if len(idxs) < 2:
-                continue
-            group_id += 1
-            for idx in idxs:
-                writer.writerow(
-                    [
-                        group_id,
-                        row_nums[idx],
-                        years[idx],
-                        municipalities[idx],
-                        categories[idx],
-                        truncate_text(texts[idx], args.text_max_len),
-                        truncate_text(norm_text, args.text_max_len),
-                        len(idxs),
-                    ]
-                )
-
-    signatures = [
-        minhash_signature(norm, args.ngram, args.sig_size) for norm in normalized
-    ]
+        for group_id, idxs in enumerate(exact_groups, start=1):
+            norm_text = truncate_text(normalized[idxs[0]], args.text_max_len)
+            writer.writerows(
+                [
+                    group_id,
+                    row_nums[idx],
+                    years[idx],
+                    municipalities[idx],
+                    categories[idx],
+                    truncate_text(texts[idx], args.text_max_len),
+                    norm_text,
+                    len(idxs),
+                ]
+                for idx in idxs
+            )
+
+    # One contiguous (rows, sig_size) array; each row is filled in place.
+    signatures = np.empty((len(normalized), args.sig_size), dtype=np.uint32)
+    for idx, norm in enumerate(normalized):
+        minhash_signature(norm, args.ngram, args.sig_size, out=signatures[idx])
     buckets = build_buckets(
         signatures, lengths, args.band_size, args.length_bucket
     )
 
+    # Candidates are packed as (lo << 32) | hi and deduplicated once after
+    # all buckets are scanned, instead of probing a set per pair.
+    candidates = []
+    for idxs in buckets:
+        if len(idxs) < 2:
+            continue
+        if args.max_block_size and len(idxs) > args.max_block_size:
+            continue
+        # Sorted by length, rows below min_length form a prefix and the
+        # relative length gap only grows with j, so the inner loop can stop
+        # at the first partner outside length_delta.
+        idxs = sorted(idxs, key=lambda idx: (lengths[idx], idx))
+        first = 0
+        while first < len(idxs) and lengths[idxs[first]] < args.min_length:
+            first += 1
+        for i in range(first, len(idxs)):
+            idx_a = idxs[i]
+            len_a = lengths[idx_a]
+            for j in range(i + 1, len(idxs)):
+                idx_b = idxs[j]
+                len_b = lengths[idx_b]
+                if args.length_delta and len_b and (len_b - len_a) / len_b > args.length_delta:
+                    break
+                if not args.include_identical and normalized[idx_a] == normalized[idx_b]:
+                    continue
+                if idx_a < idx_b:
+                    candidates.append((idx_a << 32) | idx_b)
+                else:
+                    candidates.append((idx_b << 32) | idx_a)
+
+    pair_ids = np.unique(np.fromiter(candidates, dtype=np.uint64, count=len(candidates)))
+    pairs_a = (pair_ids >> np.uint64(32)).tolist()
+    pairs_b = (pair_ids & np.uint64(0xFFFFFFFF)).tolist()
+    compare_count = len(pairs_a)
+    scores = score_pairs(
+        normalized, pairs_a, pairs_b, args.similarity_threshold, args.workers
+    )
+
     similar_path = os.path.join(args.output_dir, "similar_pairs.csv")
-    compare_count = 0
-    similar_count = 0
-    seen_pairs = set()
-    with open(similar_path, "w", encoding="utf-8", newline="") as handle:
+    matches = [
+        (idx_a, idx_b, score)
+        for idx_a, idx_b, score in zip(pairs_a, pairs_b, scores)
+        if score >= args.similarity_threshold
+    ]
+    similar_count = len(matches)
+    with open(
+        similar_path, "w", encoding="utf-8", newline="", buffering=OUTPUT_BUFFER_SIZE
+    ) as handle:
         writer = csv.writer(handle)
         writer.writerow(
             [
@@ -260,53 +452,22 @@ def main():
                 "text_b",
             ]
         )
-        for idxs in buckets.values():
-            if len(idxs) < 2:
-                continue
-            if args.max_block_size and len(idxs) > args.max_block_size:
-                continue
-            for i in range(len(idxs)):
-                idx_a = idxs[i]
-                if lengths[idx_a] < args.min_length:
-                    continue
-                for j in range(i + 1, len(idxs)):
-                    idx_b = idxs[j]
-                    if lengths[idx_b] < args.min_length:
-                        continue
-                    if idx_a < idx_b:
-                        pair_id = (idx_a << 32) | idx_b
-                    else:
-                        pair_id = (idx_b << 32) | idx_a
-                    if pair_id in seen_pairs:
-                        continue
-                    seen_pairs.add(pair_id)
-                    if not args.include_identical and normalized[idx_a] == normalized[idx_b]:
-                        continue
-                    len_max = max(lengths[idx_a], lengths[idx_b])
-                    if len_max:
-                        delta = abs(lengths[idx_a] - lengths[idx_b]) / len_max
-                        if args.length_delta and delta > args.length_delta:
-                            continue
-                    compare_count += 1
-                    score = similarity_ratio(normalized[idx_a], normalized[idx_b])
-                    if score < args.similarity_threshold:
-                        continue
-                    similar_count += 1
-                    writer.writerow(
-                        [
-                            row_nums[idx_a],
-                            row_nums[idx_b],
-                            f"{score:.3f}",
-                            years[idx_a],
-                            municipalities[idx_a],
-                            categories[idx_a],
-                            truncate_text(texts[idx_a], args.text_max_len),
-                            years[idx_b],
-                            municipalities[idx_b],
-                            categories[idx_b],
-                            truncate_text(texts[idx_b], args.text_max_len),
-                        ]
-                    )
+        writer.writerows(
+            [
+                row_nums[idx_a],
+                row_nums[idx_b],
+                f"{score:.3f}",
+                years[idx_a],
+                municipalities[idx_a],
+                categories[idx_a],
+                truncate_text(texts[idx_a], args.text_max_len),
+                years[idx_b],
+                municipalities[idx_b],
+                categories[idx_b],
+                truncate_text(texts[idx_b], args.text_max_len),
+            ]
+            for idx_a, idx_b, score in matches
+        )
 
     print(
         "Loaded rows: {rows}, encoding: {enc}".format(
@@ -2,70 +2,109 @@
 import csv
 import sqlite3
 from collections import Counter, defaultdict
+from functools import lru_cache, partial
+
+# Per-municipality category flags, OR-ed together across CSV rows.
+HAS_ORDINANCE = 1
+HAS_RULE = 2
+CATEGORY_FLAGS = {"条例": HAS_ORDINANCE, "施行規則": HAS_RULE}
+COVERAGE_LABELS = {
+    HAS_ORDINANCE | HAS_RULE: "both",
+    HAS_RULE: "rule_only",
+    HAS_ORDINANCE: "ordinance_only",
+    0: "neither",
+}
+
+PREFECTURE_SUFFIXES = ("都", "道", "府", "県")
+PREFECTURE_SUFFIX_SET = frozenset(PREFECTURE_SUFFIXES)
+_KANA_MAP = str.maketrans({"ヶ": "ケ", "ヵ": "ケ"})
 
 
 def load_csv_rows(csv_path):
     rows = []
     with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader)
+        muni_idx = header.index("自治体")
+        category_idx = header.index("区分")
         for row in reader:
-            muni = row["自治体"].strip()
-            category = row["区分"].strip()
-            rows.append((muni, category))
+            if not row:
+                continue
+            rows.append((row[muni_idx].strip(), row[category_idx].strip()))
     return rows
 
 
 def load_db_municipalities(db_path):
     conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT m.prefecture_name, m.municipality_name
-        FROM municipalities m
-        INNER JOIN ordinances o ON o.municipality_id = m.id
-        GROUP BY m.prefecture_name, m.municipality_name
-        """
-    )
-    rows = cur.fetchall()
-    conn.close()
+    try:
+        # Read-only scan: memory-map the file instead of read() per page.
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        rows = conn.execute(
+            """
+            SELECT DISTINCT m.prefecture_name, m.municipality_name
+            FROM municipalities m
+            INNER JOIN ordinances o ON o.municipality_id = m.id
+            """
+        ).fetchall()
+    finally:
+        conn.close()
     return rows
 
 
+@lru_cache(maxsize=None)
 def normalize_name(name):
-    normalized = name.strip()
-    return normalized.replace("ヶ", "ケ").replace("ヵ", "ケ")
+    return name.strip().translate(_KANA_MAP)
 
 
-def build_prefecture_prefixes(plqrefecture_names):
-    suffixes = ("都", "道", "府", "県")
+def build_prefecture_prefixes(prefecture_names):
     prefix_info = {}
     for name in prefecture_names:
         normalized = normalize_name(name)
         prefix_info[normalized] = (normalized, False)
-        if normalized.endswith(suffixes):
-            suffix = normalized[-1]
+        suffix = normalized[-1:]
+        if suffix in PREFECTURE_SUFFIX_SET:
             base = normalized[:-1]
             if suffix in ("都", "府", "県"):
                 prefix_info.setdefault(base, (normalized, True))
         else:
-            for suffix in suffixes:
+            for suffix in PREFECTURE_SUFFIXES:
                 prefix_info.setdefault(normalized + suffix, (normalized, False))
-    prefixes = sorted(prefix_info.keys(), key=len, reverse=True)
-    return prefixes, prefix_info
-
-
-def split_prefecture_municipality(name, prefecture_prefixes, prefix_info):
+    # Character trie over the prefixes; the None key marks a complete prefix.
+    prefix_trie = {}
+    for prefix in prefix_info:
+        node = prefix_trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = prefix
+    return prefix_trie, prefix_info
+
+
+def match_prefixes(normalized, prefix_trie):
+    """Prefixes of `normalized` found in the trie, longest first."""
+    matches = []
+    node = prefix_trie
+    for char in normalized:
+        node = node.get(char)
+        if node is None:
+            break
+        if None in node:
+            matches.append(node[None])
+    matches.reverse()
+    return matches
+
+
+def split_prefecture_municipality(name, prefix_trie, prefix_info):
     normalized = normalize_name(name)
-    for prefix in prefecture_prefixes:
-        if normalized.startswith(prefix):
-            pref_name, is_suffixless = prefix_info[prefix]
-            muni = normalized[len(prefix) :].strip()
-            if not muni:
-                return None, normalized
-            if is_suffixless and len(muni) <= 1:
-                # Avoid misclassifying municipalities like "大阪市" as prefixed.
-                continue
-            return pref_name, muni
+    for prefix in match_prefixes(normalized, prefix_trie):
+        pref_name, is_suffixless = prefix_info[prefix]
+        muni = normalized[len(prefix) :].strip()
+        if not muni:
+            return None, normalized
+        if is_suffixless and len(muni) <= 1:
+            # Avoid misclassifying municipalities like "大阪市" as prefixed.
+            continue
+        return pref_name, muni
     return None, normalized
 
 
@@ -77,7 +116,15 @@ def main():
     db_rows = load_db_municipalities(db_path)
 
     prefecture_names = sorted({normalize_name(pref) for pref, _ in db_rows})
-    prefecture_prefixes, prefix_info = build_prefecture_prefixes(prefecture_names)
+    prefix_trie, prefix_info = build_prefecture_prefixes(prefecture_names)
+    # CSV rows repeat the same 自治体 many times; split each distinct name once.
+    split_name = lru_cache(maxsize=None)(
+        partial(
+            split_prefecture_municipality,
+            prefix_trie=prefix_trie,
+            prefix_info=prefix_info,
+        )
+    )
 
     db_set = {(normalize_name(pref), normalize_name(muni)) for pref, muni in db_rows}
     db_muni_set = {muni for _, muni in db_set}
@@ -89,31 +136,23 @@ def main():
     csv_without_pref = set()
     csv_muni_names = set()
 
-    csv_flags_with_pref = defaultdict(lambda: {"has_ordinance": False, "has_rule": False})
-    csv_flags_without_pref = defaultdict(lambda: {"has_ordinance": False, "has_rule": False})
-    csv_flags_by_name = defaultdict(lambda: {"has_ordinance": False, "has_rule": False})
+    csv_flags_with_pref = defaultdict(int)
+    csv_flags_without_pref = defaultdict(int)
+    csv_flags_by_name = defaultdict(int)
 
     for muni_raw, category in csv_rows:
-        pref, muni = split_prefecture_municipality(
-            muni_raw, prefecture_prefixes, prefix_info
-        )
+        pref, muni = split_name(muni_raw)
+        flag = CATEGORY_FLAGS.get(category, 0)
         csv_muni_names.add(muni)
         if pref:
             key = (pref, muni)
             csv_with_pref.add(key)
-            flags = csv_flags_with_pref[key]
+            csv_flags_with_pref[key] |= flag
         else:
             key = muni
             csv_without_pref.add(key)
-            flags = csv_flags_without_pref[key]
-
-        name_flags = csv_flags_by_name[muni]
-        if category == "条例":
-            flags["has_ordinance"] = True
-            name_flags["has_ordinance"] = True
-        elif category == "施行規則":
-            flags["has_rule"] = True
-            name_flags["has_rule"] = True
+            csv_flags_without_pref[key] |= flag
+        csv_flags_by_name[muni] |= flag
 
     missing_with_pref = sorted(csv_with_pref - db_set)
     missing_without_pref = sorted(csv_without_pref - db_muni_set)
@@ -126,8 +165,8 @@ def main():
 
     for pref, muni in missing_with_pref:
         flags = csv_flags_with_pref[(pref, muni)]
-        has_rule = flags["has_rule"]
-        has_ordinance = flags["has_ordinance"]
+        has_rule = flags & HAS_RULE
+        has_ordinance = flags & HAS_ORDINANCE
         if has_rule:
             missing_with_rule_pref.append((pref, muni))
         else:
@@ -143,8 +182,9 @@ def main():
     missing_only_ordinance_no_pref = []
 
     for muni in missing_without_pref:
-        has_rule = csv_flags_without_pref[muni]["has_rule"]
-        has_ordinance = csv_flags_without_pref[muni]["has_ordinance"]
+        flags = csv_flags_without_pref[muni]
+        has_rule = flags & HAS_RULE
+        has_ordinance = flags & HAS_ORDINANCE
         if has_rule:
             missing_with_rule_no_pref.append(muni)
         else:
@@ -154,16 +194,8 @@ def main():
         if has_ordinance and not has_rule:
             missing_only_ordinance_no_pref.append(muni)
 
-    csv_rule_counts = Counter()
-    for flags in csv_flags_by_name.values():
-        if flags["has_rule"] and flags["has_ordinance"]:
-            csv_rule_counts["both"] += 1
-        elif flags["has_rule"]:
-            csv_rule_counts["rule_only"] += 1
-        elif flags["has_ordinance"]:
-            csv_rule_counts["ordinance_only"] += 1
-        else:
-            csv_rule_counts["neither"] += 1
+    flag_counts = Counter(csv_flags_by_name.values())
+    csv_rule_counts = {label: flag_counts[flags] for flags, label in COVERAGE_LABELS.items()}
 
     print("CSV municipalities (with prefecture):", len(csv_with_pref))
     print("CSV municipalities (without prefecture):", len(csv_without_pref))
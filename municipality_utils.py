@@ -5,14 +5,32 @@
 import re
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+
+def _build_suffix_trie(words: Iterable[str]) -> Dict:
+    """語を末尾から辿る文字トライを作る（None キーが語の終端）"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in reversed(word):
+            node = node.setdefault(ch, {})
+        node[None] = True
+    return trie
 
 
 class MunicipalityExtractor:
     """条例名から自治体名を抽出するクラス"""
 
     # 自治体名の終わりを示す接尾辞
-    SUFFIXES = r'(都|道|府|県|市|区|町|村)'
+    SUFFIXES = r'([都道府県市区町村])'
+    SUFFIX_SET = frozenset('都道府県市区町村')
 
     # よくある条例のキーワード（除外用）
     KEYWORDS = [
@@ -25,6 +43,26 @@ class MunicipalityExtractor:
         '平和都市', '暴力団排除', '空き家', '宿泊', '温泉'
     ]
 
+    # extract() で使うパターン（呼び出しごとの組み立て・キャッシュ参照を避ける）
+    _PAT1 = re.compile(r'^(.+?' + SUFFIXES + r')における')
+    _PAT2 = re.compile(r'^(.+?' + SUFFIXES + r')')
+    _PAT3 = re.compile(r'^([^あ-ん]{1,10}?' + SUFFIXES + r')')
+    _KEYWORD_SUFFIX_TRIE = _build_suffix_trie(KEYWORDS)
+    # 「に関する条例」等の定型表現（最も左の出現位置で切る）
+    _ORDINANCE_SUFFIX_RE = re.compile(r'に関する(?:条例|規則)')
+
+    @classmethod
+    def _ends_with_keyword(cls, text: str) -> bool:
+        """text が KEYWORDS のいずれかで終わるかを末尾からの1回の走査で判定する"""
+        node = cls._KEYWORD_SUFFIX_TRIE
+        for ch in reversed(text):
+            node = node.get(ch)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
     @classmethod
     def extract(cls, ordinance_name: str) -> Optional[str]:
         """
@@ -43,27 +81,21 @@ class MunicipalityExtractor:
             '瑞浪市'
         """
         # パターン1: <自治体名>における...
-        pattern1 = r'^(.+?' + cls.SUFFIXES + r')における'
-        match = re.search(pattern1, ordinance_name)
+        match = cls._PAT1.search(ordinance_name)
         if match:
             return match.group(1)
 
         # パターン2: <自治体名><キーワード>に関する条例
         # まず接尾辞で終わる最短のマッチを探す
-        pattern2 = r'^(.+?' + cls.SUFFIXES + r')'
-        match = re.search(pattern2, ordinance_name)
+        match = cls._PAT2.search(ordinance_name)
         if match:
             candidate = match.group(1)
             # キーワードで終わっていないことを確認
-            for keyword in cls.KEYWORDS:
-                if candidate.endswith(keyword):
-                    break
-            else:
+            if not cls._ends_with_keyword(candidate):
                 return candidate
 
         # パターン3: フォールバック - 先頭から接尾辞まで
-        pattern3 = r'^([^あ-ん]{1,10}?' + cls.SUFFIXES + r')'
-        match = re.search(pattern3, ordinance_name)
+        match = cls._PAT3.search(ordinance_name)
         if match:
             return match.group(1)
 
@@ -91,9 +123,9 @@ class MunicipalityExtractor:
         text = ordinance_name.replace(municipality, '')
 
         # 「に関する条例」等の定型表現を除去
-        for suffix in ['に関する条例', 'に関する規則', 'の施行に関する条例', '等に関する条例']:
-            if suffix in text:
-                text = text.split(suffix)[0]
+        suffix_match = cls._ORDINANCE_SUFFIX_RE.search(text)
+        if suffix_match:
+            text = text[:suffix_match.start()]
 
         # 「における」を除去
         text = text.replace('における', '')
@@ -113,18 +145,25 @@ class MunicipalityURLMap:
         """
         self.map_file = Path(map_file)
         self._data = None
-        self._load()
-
-    def _load(self):
-        """マッピングファイルを読み込む"""
+        # ファイルの有無だけ先に確認し、JSONのパースは初回アクセスまで遅らせる
         if not self.map_file.exists():
             raise FileNotFoundError(
                 f"マッピングファイルが見つかりません: {self.map_file}\n"
                 "asset/例規集採用自治体一覧.htmlから作成してください。"
             )
 
-        with open(self.map_file, 'r', encoding='utf-8') as f:
-            self._data = json.load(f)
+    @property
+    def data(self) -> Dict[str, Dict[str, Any]]:
+        """マッピング本体（初回アクセス時に読み込む）"""
+        if self._data is None:
+            self._load()
+        return self._data
+
+    def _load(self):
+        """マッピングファイルを読み込む（orjson があれば使う）"""
+        with open(self.map_file, 'rb') as f:
+            raw = f.read()
+        self._data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
 
     def get_url(self, municipality: str) -> Optional[Dict[str, Any]]:
         """
@@ -142,7 +181,7 @@ class MunicipalityURLMap:
             >>> mapper.get_url("中川村")
             {'prefecture': '長野県', 'url': 'https://www1.g-reiki.net/vill.nakagawa.nagano/reiki_menu.html'}
         """
-        return self._data.get(municipality)
+        return self.data.get(municipality)
 
     def search_by_keyword(self, keyword: str) -> list:
         """
@@ -155,7 +194,7 @@ class MunicipalityURLMap:
             マッチした自治体のリスト [{"name": "自治体名", "prefecture": "都道府県", "url": "URL"}, ...]
         """
         results = []
-        for municipality, data in self._data.items():
+        for municipality, data in self.data.items():
             if keyword in municipality:
                 results.append({
                     "name": municipality,
@@ -171,7 +210,7 @@ class MunicipalityURLMap:
         Returns:
             自治体名のリスト
         """
-        return list(self._data.keys())
+        return list(self.data.keys())
 
     def get_statistics(self) -> Dict[str, int]:
         """
@@ -182,19 +221,16 @@ class MunicipalityURLMap:
         """
         from collections import Counter
 
-        types = Counter()
-        prefectures = set()
-
-        for municipality, data in self._data.items():
-            prefectures.add(data["prefecture"])
-            # 接尾辞をカウント
-            for suffix in ['都', '道', '府', '県', '市', '区', '町', '村']:
-                if municipality.endswith(suffix):
-                    types[suffix] += 1
-                    break
+        suffix_set = MunicipalityExtractor.SUFFIX_SET
+        # 接尾辞をカウント
+        types = Counter(
+            municipality[-1] for municipality in self.data
+            if municipality[-1:] in suffix_set
+        )
+        prefectures = {data["prefecture"] for data in self.data.values()}
 
         return {
-            "total": len(self._data),
+            "total": len(self.data),
             "prefectures": len(prefectures),
             "by_type": dict(types)
         }
@@ -215,28 +251,17 @@ def generate_search_keywords(ordinance_name: str, municipality: str) -> list:
         >>> generate_search_keywords(
         ...     "中川村太陽光発電施設の設置等に関する条例", "中川村"
         ... )
-        ['太陽光発電施設 規則', '太陽光発電 施行規則', '太陽光 規則', '太陽光発電施設 規則']
+        ['太陽光発電施設の設置等 規則', '太陽光発電施設の設置等 施行規則', '太陽光発電施設の設置 規則']
     """
     extractor = MunicipalityExtractor()
     keyword = extractor.extract_ordinance_keyword(ordinance_name, municipality)
 
-    # 検索キーワードのパターン
-    patterns = [
+    # 検索キーワードのパターン（重複は順序を保って除去）
+    return list(dict.fromkeys([
         f"{keyword} 規則",
         f"{keyword} 施行規則",
         f"{keyword[:10]} 規則",  # 短縮版
-        f"{keyword} 規則",  # 元のキーワード
-    ]
-
-    # 重複を除去
-    seen = set()
-    unique_patterns = []
-    for p in patterns:
-        if p not in seen:
-            seen.add(p)
-            unique_patterns.append(p)
-
-    return unique_patterns
+    ]))
 
 
 if __name__ == "__main__":
@@ -5,12 +5,122 @@
 
 import sqlite3
 import re
+import sys
 import csv
 import unicodedata
-from bs4 import BeautifulSoup
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from lxml import etree
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import json
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# 和暦日付（例: 平成26年1月29日）
+_DATE_RE = re.compile(r'(平成|令和)(\d+|元)年(\d+)月(\d+)日')
+# _DATE_RE に一致しうる最短の長さ（例: 令和元年1月1日）
+_MIN_DATE_LEN = 8
+# 日付らしい記述を含むか（変換できなければ要レビュー）
+_DATE_REVIEW_RE = re.compile(r"(平成|令和|\d+年|\d+月|\d+日|公布|施行)")
+# 年度見出し（例: （平成26年度制定））
+_YEAR_RE = re.compile(r'（(.+)制定）')
+# 自治体名の正規化: 空白（\s に一致する全文字、U+3000 が最大）を削除し、ヶ/ヵ を置換
+_MUNICIPALITY_NORM_TABLE = str.maketrans({
+    **{chr(code): None for code in range(0x3001) if chr(code).isspace()},
+    "ヶ": "ケ",
+    "ヵ": "カ",
+})
+
+
+def _element_text(element) -> str:
+    """要素内のテキストを各片ごとに strip して連結（BeautifulSoup の get_text(strip=True) 相当）"""
+    return "".join(text.strip() for text in element.itertext())
+
+
+def _element_strings(element) -> Iterator[str]:
+    """要素内の空でないテキスト片を strip して返す（stripped_strings 相当）"""
+    for text in element.itertext():
+        text = text.strip()
+        if text:
+            yield text
+
+
+_ERA_BASE_YEAR = {
+    "平成": 1988,
+    "令和": 2018
+}
+
+
+@lru_cache(maxsize=None)
+def _era_year_to_seireki(era: str, year: int) -> str:
+    """和暦年度を西暦に変換（元号と年の組は少ないので全件キャッシュ）"""
+    base_year = _ERA_BASE_YEAR.get(era)
+    if base_year is None:
+        return None
+    return str(base_year + year)
+
+
+@lru_cache(maxsize=16384)
+def _parse_date(date_str: str) -> str:
+    """日付を標準フォーマットに変換（同じ日付文字列が多数の行で繰り返されるのでキャッシュする）"""
+    if not date_str:
+        return None
+    # 注記など日付になりえない短い文字列は正規表現を通さない
+    if len(date_str) < _MIN_DATE_LEN:
+        return date_str
+
+    # "平成26年1月29日公布" のような形式から日付部分を抽出
+    date_match = _DATE_RE.search(date_str)
+    if date_match:
+        era = date_match.group(1)
+        year = date_match.group(2)
+        month = date_match.group(3)
+        day = date_match.group(4)
+
+        # 年号を西暦に変換
+        if year == "元":
+            year = 1
+        else:
+            year = int(year)
+
+        seireki = _era_year_to_seireki(era, year)
+        if not seireki:
+            return date_str
+
+        return f"{seireki}-{month.zfill(2)}-{day.zfill(2)}"
+
+    return date_str
+
+
+@lru_cache(maxsize=4096)
+def _normalize_municipality_name(text: str) -> str:
+    """NFKC 正規化＋空白除去＋ヶ/ヵ置換（同じ自治体名が繰り返し出るのでキャッシュする）"""
+    # ASCII は NFKC で変化しないので正規化を省略する
+    if not text.isascii() and not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    return text.translate(_MUNICIPALITY_NORM_TABLE)
+
+# 要レビュー理由のビット
+REVIEW_MISSING_ENACTMENT_YEAR = 1
+REVIEW_AMBIGUOUS_MUNICIPALITY = 2
+REVIEW_UNKNOWN_PREFECTURE = 4
+REVIEW_UNPARSED_PROMULGATION_DATE = 8
+REVIEW_UNPARSED_IMPLEMENTATION_DATE = 16
+# ビット -> 理由名（理由名の昇順）
+_REVIEW_REASON_NAMES = (
+    (REVIEW_AMBIGUOUS_MUNICIPALITY, "ambiguous_municipality"),
+    (REVIEW_MISSING_ENACTMENT_YEAR, "missing_enactment_year"),
+    (REVIEW_UNKNOWN_PREFECTURE, "unknown_prefecture"),
+    (REVIEW_UNPARSED_IMPLEMENTATION_DATE, "unparsed_implementation_date"),
+    (REVIEW_UNPARSED_PROMULGATION_DATE, "unparsed_promulgation_date"),
+)
+
+# 保存をまとめて行う件数（この件数ごとに executemany + commit）
+SAVE_BATCH_SIZE = 1000
+
 class OrdinanceParser:
     # 47都道府県のリスト（長い順にソート）
     PREFECTURES = [
@@ -36,37 +146,72 @@ class OrdinanceParser:
         self.municipality_list_file = municipality_list_file
         self.conn = None
         self.cursor = None
+        # DBの (都道府県, 市区町村) -> id、(自治体id, 条例名, 制定年度) -> id のキャッシュ
+        self._municipality_ids = {}
+        self._ordinance_ids = {}
         self._municipality_name_map = {}
+        # 自治体セルの文字列 -> (都道府県, 市区町村, 要レビュー理由ビット)
+        self._resolve_cache: Dict[str, Tuple[str, str, int]] = {}
+        # 都道府県名の文字トライ（None キーが名前の終端）
+        self._prefecture_trie = {}
+        for prefecture in self.PREFECTURES:
+            node = self._prefecture_trie
+            for ch in prefecture:
+                node = node.setdefault(ch, {})
+            node[None] = prefecture
+        self._prefecture_max_len = max(map(len, self.PREFECTURES))
         self._load_municipality_list()
 
     def connect_db(self):
         """データベース接続"""
         self.conn = sqlite3.connect(self.db_file)
+        # 単一プロセスでの一括書き込み向け: WAL + synchronous=NORMAL でコミット毎の fsync を減らす
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        self.conn.execute("PRAGMA mmap_size=268435456")
         self.cursor = self.conn.cursor()
 
     def _normalize_municipality_text(self, text: str) -> str:
         """自治体名を検索用に正規化"""
         if not text:
             return ""
-        text = unicodedata.normalize("NFKC", text)
-        text = re.sub(r"\s+", "", text)
-        return text.replace("ヶ", "ケ").replace("ヵ", "カ")
+        return _normalize_municipality_name(text)
 
     def _load_municipality_list(self):
         """地方自治体リストを読み込んで検索用インデックスを作成"""
         with open(self.municipality_list_file, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+            # 使うのは2列だけなので、行ごとの dict を作らず列番号で読む
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if "都道府県名（漢字）" not in header or "市区町村名（漢字）" not in header:
+                return
+            pref_col = header.index("都道府県名（漢字）")
+            mun_col = header.index("市区町村名（漢字）")
+            min_len = max(pref_col, mun_col) + 1
             for row in reader:
-                prefecture = (row.get("都道府県名（漢字）") or "").strip()
-                municipality = (row.get("市区町村名（漢字）") or "").strip()
+                # 列が足りない行は DictReader と同様に空欄扱い（＝読み飛ばす）
+                if len(row) < min_len:
+                    continue
+                prefecture = row[pref_col].strip()
+                municipality = row[mun_col].strip()
                 if not prefecture or not municipality:
                     continue
 
-                normalized_municipality = self._normalize_municipality_text(municipality)
+                # 都道府県名は47種類しかないので intern して同じ文字列オブジェクトを共有する
+                normalized_municipality = sys.intern(self._normalize_municipality_text(municipality))
                 self._municipality_name_map.setdefault(normalized_municipality, []).append(
-                    (prefecture, municipality)
+                    (sys.intern(prefecture), sys.intern(municipality))
                 )
 
+        # 同名の自治体がない（大多数の）名前は (都道府県, 市区町村) のタプルを直接持ち、
+        # 同名が複数ある名前だけリストのまま残す
+        self._municipality_name_map = {
+            name: matches[0] if len(matches) == 1 else matches
+            for name, matches in self._municipality_name_map.items()
+        }
+
     def create_tables(self):
         """テーブル作成"""
         # 自治体マスタ
@@ -124,42 +269,11 @@ class OrdinanceParser:
 
     def parse_era_year_to_seireki(self, era: str, year: int) -> str:
         """和暦年度を西暦に変換"""
-        era_base_year = {
-            "平成": 1988,
-            "令和": 2018
-        }
-
-        base_year = era_base_year.get(era)
-        if base_year is None:
-            return None
-        return str(base_year + year)
+        return _era_year_to_seireki(era, year)
 
     def parse_date_to_standard_format(self, date_str: str) -> str:
         """日付を標準フォーマットに変換"""
-        if not date_str:
-            return None
-
-        # "平成26年1月29日公布" のような形式から日付部分を抽出
-        date_match = re.search(r'(平成|令和)(\d+|元)年(\d+)月(\d+)日', date_str)
-        if date_match:
-            era = date_match.group(1)
-            year = date_match.group(2)
-            month = date_match.group(3)
-            day = date_match.group(4)
-
-            # 年号を西暦に変換
-            if year == "元":
-                year = 1
-            else:
-                year = int(year)
-
-            seireki = self.parse_era_year_to_seireki(era, year)
-            if not seireki:
-                return date_str
-
-            return f"{seireki}-{month.zfill(2)}-{day.zfill(2)}"
-
-        return date_str
+        return _parse_date(date_str)
 
     def _parse_date_with_review(self, date_str: str) -> Tuple[str, bool]:
         """日付を標準化し、要レビュー判定を返す"""
@@ -168,191 +282,267 @@ class OrdinanceParser:
 
         normalized = date_str.strip()
         standardized = self.parse_date_to_standard_format(normalized)
-        if standardized == normalized and re.search(r"(平成|令和|\d+年|\d+月|\d+日|公布|施行)", normalized):
+        if standardized == normalized and _DATE_REVIEW_RE.search(normalized):
             return standardized, True
         return standardized, False
 
     def extract_municipality_info(self, municipality_text: str) -> Tuple[str, str]:
         """自治体名から都道府県と市区町村を分離"""
+        prefecture, municipality, _ = self._resolve_municipality(municipality_text)
+        return prefecture, municipality
+
+    def _resolve_municipality(self, municipality_text: str) -> Tuple[str, str, int]:
+        """都道府県と市区町村に分離し、解決できなかった場合の要レビュー理由ビットも返す"""
+        # 同じ自治体のセルは何度も出てくるので、入力文字列ごとに結果を使い回す
+        cached = self._resolve_cache.get(municipality_text)
+        if cached is None:
+            cached = self._resolve_cache[municipality_text] = self._resolve_municipality_uncached(
+                municipality_text
+            )
+        return cached
+
+    def _resolve_municipality_uncached(self, municipality_text: str) -> Tuple[str, str, int]:
+        """_resolve_municipality の本体（キャッシュなし）
+
+        返す文字列は intern しておき、表記の違うセルから同じ自治体名になった場合も
+        同じ文字列オブジェクトを共有させる（都道府県名はトライ内の定数そのもの）。
+        """
         # 1) 都道府県名を先頭から完全一致で検索
-        for prefecture in self.PREFECTURES:
-            if municipality_text.startswith(prefecture):
-                municipality = municipality_text[len(prefecture):]
-                return prefecture, municipality
+        prefecture = None
+        node = self._prefecture_trie
+        for ch in municipality_text[:self._prefecture_max_len]:
+            node = node.get(ch)
+            if node is None:
+                break
+            prefecture = node.get(None, prefecture)
+        if prefecture:
+            return prefecture, sys.intern(municipality_text[len(prefecture):]), 0
 
         # 2) 市区町村名のみの場合（政令指定都市など）
         normalized_text = self._normalize_municipality_text(municipality_text)
         municipality_matches = self._municipality_name_map.get(normalized_text)
-        if municipality_matches and len(municipality_matches) == 1:
-            return municipality_matches[0]
-
-        # 3) 都道府県が見つからない場合
-        return "不明", municipality_text
+        if isinstance(municipality_matches, tuple):
+            prefecture, municipality = municipality_matches
+            return prefecture, municipality, 0
 
-    def parse_html(self) -> List[Dict]:
-        """HTMLファイルをパース"""
-        with open(self.html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        # 3) 都道府県が見つからない場合（同名の自治体が複数あれば曖昧）
+        if municipality_matches:
+            return "不明", sys.intern(municipality_text), REVIEW_AMBIGUOUS_MUNICIPALITY
+        return "不明", sys.intern(municipality_text), REVIEW_UNKNOWN_PREFECTURE
 
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        ordinance_data = []
+    def parse_html(self) -> Iterator[Dict]:
+        """HTMLファイルをパースし、条例データを1件ずつ返す（p と tr を閉じタグごとに逐次処理）"""
         current_enactment_year = None
 
-        # 全てのpタグを探す
-        all_p_tags = soup.find_all('p')
-
-        for i, p_tag in enumerate(all_p_tags):
-            p_text = p_tag.get_text(strip=True)
-
-            # 年度見出しをチェック
-            year_match = re.search(r'（(.+)制定）', p_text)
-            if year_match:
-                current_enactment_year = year_match.group(1)
-                print(f"Found year: {current_enactment_year}")
-
-                # 次の年度見出しが見つかるまでのすべてのテーブルを処理
-                for j in range(i + 1, len(all_p_tags)):
-                    next_p = all_p_tags[j]
-                    next_text = next_p.get_text(strip=True)
-
-                    # 次の年度見出しに達したら終了
-                    if re.search(r'（(.+)制定）', next_text):
-                        break
-
-                    # 現在のpタグの中にtableがあるかチェック
-                    table = next_p.find('table')
-                    if table:
-                        rows = table.find_all('tr')
-
-                        for row in rows:  # 全ての行を処理（ヘッダーがないため）
-                            cells = row.find_all('td')
-                            if len(cells) >= 4:
-                                # 自治体情報
-                                municipality_text = cells[0].get_text(strip=True)
-                                prefecture, municipality = self.extract_municipality_info(municipality_text)
-                                review_reasons = set()
-                                if not current_enactment_year:
-                                    review_reasons.add("missing_enactment_year")
-                                if prefecture == "不明":
-                                    normalized_text = self._normalize_municipality_text(municipality_text)
-                                    municipality_matches = self._municipality_name_map.get(normalized_text)
-                                    if municipality_matches and len(municipality_matches) > 1:
-                                        review_reasons.add("ambiguous_municipality")
-                                    else:
-                                        review_reasons.add("unknown_prefecture")
-
-                                # 条例名とURL
-                                ordinance_name = ""
-                                url = None
-                                name_cell = cells[1]
-
-                                # リンクを探す
-                                link = name_cell.find('a')
-                                if link:
-                                    url = link.get('href', '')
-                                    # テキストをすべて結合
-                                    ordinance_name = name_cell.get_text(strip=True)
-                                else:
-                                    ordinance_name = name_cell.get_text(strip=True)
-
-                                # 公布日
-                                promulgation_text = cells[2].get_text(strip=True)
-                                promulgation_date, needs_review = self._parse_date_with_review(promulgation_text)
-                                if needs_review:
-                                    review_reasons.add("unparsed_promulgation_date")
-
-                                # 施行日
-                                implementation_dates = []
-                                impl_cell = cells[3]
-
-                                # セル内のテキスト（pタグ以外も含む）を処理
-                                for impl_text in impl_cell.stripped_strings:
-                                    impl_date, needs_review = self._parse_date_with_review(impl_text)
-                                    if needs_review:
-                                        review_reasons.add("unparsed_implementation_date")
-                                    description = "初回施行" if "改正" not in impl_text else "改正施行"
-                                    implementation_dates.append({
-                                        'date': impl_date,
-                                        'description': description
-                                    })
-
-                                review_needed = bool(review_reasons)
-                                if review_needed:
-                                    reasons = ", ".join(sorted(review_reasons))
-                                    print(
-                                        "WARNING: review needed - "
-                                        f"reasons=[{reasons}] "
-                                        f"municipality='{municipality_text}' "
-                                        f"ordinance='{ordinance_name}'"
-                                    )
-
-                                # データを保存
-                                ordinance_data.append({
-                                    'prefecture': prefecture,
-                                    'municipality': municipality,
-                                    'ordinance_name': ordinance_name,
-                                    'url': url,
-                                    'enactment_year': current_enactment_year,
-                                    'promulgation_date': promulgation_date,
-                                    'implementation_dates': implementation_dates,
-                                    'review_needed': review_needed,
-                                    'review_reasons': sorted(review_reasons),
-                                    'post_review_instruction': ""
-                                })
-                                print(f"Processed: {prefecture} {municipality}")
-
-        return ordinance_data
-
-    def save_to_database(self, ordinance_data: List[Dict]):
-        """データをデータベースに保存"""
-        for data in ordinance_data:
-            # 自治体を保存
-            self.cursor.execute("""
-                INSERT OR IGNORE INTO municipalities (prefecture_name, municipality_name)
-                VALUES (?, ?)
-            """, (data['prefecture'], data['municipality']))
-
-            # 自治体IDを取得
-            self.cursor.execute("""
-                SELECT id FROM municipalities
-                WHERE prefecture_name = ? AND municipality_name = ?
-            """, (data['prefecture'], data['municipality']))
-
-            municipality_id = self.cursor.fetchone()[0]
+        context = etree.iterparse(
+            self.html_file,
+            events=('end',),
+            tag=('p', 'tr'),
+            html=True,
+            encoding='utf-8',
+        )
+        for _, element in context:
+            if element.tag == 'p':
+                # table 内の p は年度見出しとして扱わない（セル内容は行の処理で読む）
+                if next(element.iterancestors('table'), None) is not None:
+                    continue
+                # 年度見出しをチェック
+                year_match = _YEAR_RE.search(_element_text(element))
+                if year_match:
+                    current_enactment_year = sys.intern(year_match.group(1))
+                    print(f"Found year: {current_enactment_year}")
+            else:
+                # 最初の年度見出しより前のtableは対象外
+                if current_enactment_year is not None:
+                    data = self._parse_row(element, current_enactment_year)
+                    if data is not None:
+                        yield data
+                # 入れ子の table の行は外側の行の td としても読むため、外側の行を閉じるまで残す
+                if next(element.iterancestors('tr'), None) is not None:
+                    continue
 
-            # 条例を保存
-            self.cursor.execute("""
-                INSERT INTO ordinances
-                (municipality_id, ordinance_name, url, enactment_year, promulgation_date)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(municipality_id, ordinance_name, enactment_year)
-                DO UPDATE SET
-                    url = COALESCE(NULLIF(ordinances.url, ''), excluded.url),
-                    promulgation_date = COALESCE(NULLIF(ordinances.promulgation_date, ''), excluded.promulgation_date)
-            """, (municipality_id, data['ordinance_name'], data['url'],
-                  data['enactment_year'], data['promulgation_date']))
+            # 処理済みの要素と、それより前の兄弟要素を解放してメモリを一定に保つ
+            element.clear()
+            parent = element.getparent()
+            while element.getprevious() is not None:
+                del parent[0]
+        del context
+
+    def _parse_row(self, row, current_enactment_year: str) -> Optional[Dict]:
+        """tr 要素1行から条例データを取り出す（td が4つ未満の行は None）"""
+        cells = list(row.iter('td'))
+        if len(cells) < 4:
+            return None
 
-            self.cursor.execute("""
-                SELECT id FROM ordinances
-                WHERE municipality_id = ? AND ordinance_name = ? AND enactment_year = ?
-            """, (municipality_id, data['ordinance_name'], data['enactment_year']))
-            ordinance_id = self.cursor.fetchone()[0]
-
-            # 施行日を保存
-            for impl_data in data['implementation_dates']:
-                self.cursor.execute("""
-                    INSERT OR IGNORE INTO implementation_dates
-                    (ordinance_id, implementation_date, description)
-                    VALUES (?, ?, ?)
-                """, (ordinance_id, impl_data['date'], impl_data['description']))
+        # 自治体情報
+        municipality_text = _element_text(cells[0])
+        prefecture, municipality, review_flags = self._resolve_municipality(municipality_text)
+        if not current_enactment_year:
+            review_flags |= REVIEW_MISSING_ENACTMENT_YEAR
+
+        # 条例名とURL
+        ordinance_name = ""
+        url = None
+        name_cell = cells[1]
+
+        # リンクを探す
+        link = name_cell.find('.//a')
+        if link is not None:
+            url = link.get('href', '')
+            # テキストをすべて結合
+            ordinance_name = _element_text(name_cell)
+        else:
+            ordinance_name = _element_text(name_cell)
+
+        # 公布日
+        promulgation_text = _element_text(cells[2])
+        promulgation_date, needs_review = self._parse_date_with_review(promulgation_text)
+        if needs_review:
+            review_flags |= REVIEW_UNPARSED_PROMULGATION_DATE
+
+        # 施行日
+        implementation_dates = []
+        impl_cell = cells[3]
+
+        # セル内のテキスト（pタグ以外も含む）を処理
+        for impl_text in _element_strings(impl_cell):
+            impl_date, needs_review = self._parse_date_with_review(impl_text)
+            if needs_review:
+                review_flags |= REVIEW_UNPARSED_IMPLEMENTATION_DATE
+            description = "改正施行" if "改正" in impl_text else "初回施行"
+            implementation_dates.append({
+                'date': impl_date,
+                'description': description
+            })
+
+        review_needed = bool(review_flags)
+        review_reasons = []
+        if review_needed:
+            review_reasons = [name for bit, name in _REVIEW_REASON_NAMES if review_flags & bit]
+            reasons = ", ".join(review_reasons)
+            print(
+                "WARNING: review needed - "
+                f"reasons=[{reasons}] "
+                f"municipality='{municipality_text}' "
+                f"ordinance='{ordinance_name}'"
+            )
 
-        self.conn.commit()
+        # データを保存
+        data = {
+            'prefecture': prefecture,
+            'municipality': municipality,
+            'ordinance_name': ordinance_name,
+            'url': url,
+            'enactment_year': current_enactment_year,
+            'promulgation_date': promulgation_date,
+            'implementation_dates': implementation_dates,
+            'review_needed': review_needed,
+            'review_reasons': review_reasons,
+            'post_review_instruction': ""
+        }
+        print(f"Processed: {prefecture} {municipality}")
+        return data
+
+    def _fetch_new_ids(self, table: str, key_columns: str, id_cache: Dict):
+        """前回の取得以降に追加された行だけを id_cache に読み込む（id は単調増加）"""
+        last_id = max(id_cache.values(), default=0)
+        self.cursor.execute(
+            f"SELECT id, {key_columns} FROM {table} WHERE id > ?", (last_id,)
+        )
+        for row_id, *key in self.cursor.fetchall():
+            id_cache[tuple(key)] = row_id
 
-    def export_to_json(self, ordinance_data: List[Dict], output_file: str = "data/ordinance_data.json"):
-        """JSONファイルに出力"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(ordinance_data, f, ensure_ascii=False, indent=2)
+    def save_to_database(self, ordinance_data: List[Dict]):
+        """データをデータベースに保存（1回の呼び出しを1トランザクションで保存）"""
+        try:
+            with self.conn:
+                self._insert_ordinances(ordinance_data)
+        except Exception:
+            # ロールバックされた行の id をキャッシュに残さない
+            self._municipality_ids.clear()
+            self._ordinance_ids.clear()
+            raise
+
+    def _insert_ordinances(self, ordinance_data: List[Dict]):
+        """自治体・条例・施行日を executemany でまとめて書き込む（commit は呼び出し側）
+
+        パラメータはジェネレータで渡し、中間リストを作らずに sqlite3 側で1行ずつ消費させる。
+        """
+        # 自治体を一括保存し、IDは新しく増えた行だけをまとめて引く
+        self.cursor.executemany("""
+            INSERT OR IGNORE INTO municipalities (prefecture_name, municipality_name)
+            VALUES (?, ?)
+        """, ((data['prefecture'], data['municipality']) for data in ordinance_data))
+
+        municipality_ids = self._municipality_ids
+        self._fetch_new_ids("municipalities", "prefecture_name, municipality_name", municipality_ids)
+
+        # 条例を一括保存（入力順のまま）
+        ordinance_keys = [
+            (
+                municipality_ids[(data['prefecture'], data['municipality'])],
+                data['ordinance_name'],
+                data['enactment_year'],
+            )
+            for data in ordinance_data
+        ]
+        self.cursor.executemany("""
+            INSERT INTO ordinances
+            (municipality_id, ordinance_name, url, enactment_year, promulgation_date)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(municipality_id, ordinance_name, enactment_year)
+            DO UPDATE SET
+                url = COALESCE(NULLIF(ordinances.url, ''), excluded.url),
+                promulgation_date = COALESCE(NULLIF(ordinances.promulgation_date, ''), excluded.promulgation_date)
+        """, (
+            (municipality_id, ordinance_name, data['url'], enactment_year, data['promulgation_date'])
+            for (municipality_id, ordinance_name, enactment_year), data in zip(ordinance_keys, ordinance_data)
+        ))
+
+        ordinance_ids = self._ordinance_ids
+        self._fetch_new_ids(
+            "ordinances", "municipality_id, ordinance_name, enactment_year", ordinance_ids
+        )
+
+        # 施行日を一括保存
+        self.cursor.executemany("""
+            INSERT OR IGNORE INTO implementation_dates
+            (ordinance_id, implementation_date, description)
+            VALUES (?, ?, ?)
+        """, (
+            (ordinance_ids[key], impl_data['date'], impl_data['description'])
+            for key, data in zip(ordinance_keys, ordinance_data)
+            for impl_data in data['implementation_dates']
+        ))
+
+    def save_in_batches(self, ordinance_data: Iterable[Dict], batch_size: int = SAVE_BATCH_SIZE) -> Iterator[Dict]:
+        """batch_size 件ごとにデータベースへ保存しながら、同じデータを後段へ流す"""
+        batch = []
+        for data in ordinance_data:
+            batch.append(data)
+            if len(batch) >= batch_size:
+                self.save_to_database(batch)
+                yield from batch
+                batch = []
+        if batch:
+            self.save_to_database(batch)
+            yield from batch
+
+    def export_to_json(self, ordinance_data: Iterable[Dict], output_file: str = "data/ordinance_data.json") -> int:
+        """JSONファイルに1件ずつ出力（json.dump(..., indent=2) と同じ形式）し、件数を返す"""
+        count = 0
+        with open(output_file, 'wb') as f:
+            f.write(b"[")
+            for data in ordinance_data:
+                f.write(b",\n  " if count else b"\n  ")
+                if HAS_ORJSON:
+                    encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                else:
+                    encoded = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+                f.write(encoded.replace(b"\n", b"\n  "))
+                count += 1
+            f.write(b"\n]" if count else b"]")
+        return count
 
     def run(self):
         """メイン処理"""
@@ -362,15 +552,10 @@ class OrdinanceParser:
         print("テーブル作成...")
         self.create_tables()
 
-        print("HTMLパース開始...")
-        ordinance_data = self.parse_html()
-        print(f"{len(ordinance_data)}件の条例データを抽出しました")
-
-        print("データベース保存開始...")
-        self.save_to_database(ordinance_data)
-
-        print("JSONエクスポート...")
-        self.export_to_json(ordinance_data)
+        # パース・保存・JSONエクスポートを1回の走査で流す（全件をメモリに持たない）
+        print("HTMLパース・データベース保存・JSONエクスポート開始...")
+        ordinance_count = self.export_to_json(self.save_in_batches(self.parse_html()))
+        print(f"{ordinance_count}件の条例データを抽出しました")
 
         print("完了!")
 
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, re, json, time, hashlib, subprocess, argparse, sys, sqlite3
+import os, re, json, hashlib, subprocess, argparse, sys, sqlite3, codecs
+from datetime import datetime, timezone
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Optional
 from pathlib import Path
 from urllib.parse import urlparse
@@ -18,6 +21,15 @@ try:
 except Exception:
     HAS_TRA = False
 
+# BeautifulSoup は lxml があればそちらで解析する（html.parser より速い）
+try:
+    import lxml.html
+    HAS_LXML = True
+    BS_PARSER = "lxml"
+except Exception:
+    HAS_LXML = False
+    BS_PARSER = "html.parser"
+
 # PDF text extractors
 from pdfminer.high_level import extract_text as pdf_extract_text
 try:
@@ -30,6 +42,8 @@ except Exception:
 OUT_DIR = Path("out_db")
 PDF_DIR = Path("out_pdf_db")
 DB_PATH = Path("data/ordinance_data.db")
+# 同時に取得するURL数のデフォルト
+DEFAULT_WORKERS = 16
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; OrdinanceTextBot/1.0; +https://example.invalid)"
@@ -43,24 +57,68 @@ class SSLAdapter(HTTPAdapter):
         kwargs['ssl_context'] = ctx
         return super().init_poolmanager(*args, **kwargs)
 
+# keep-alive で使い回す接続数（ホストごと）
+POOL_SIZE = 64
+
 def create_session():
     """Create a requests session with custom SSL adapter."""
     s = requests.Session()
-    s.mount('https://', SSLAdapter())
+    s.mount('https://', SSLAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+    s.mount('http://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
     s.headers.update(HEADERS)
     return s
 
+@lru_cache(maxsize=None)
+def get_session():
+    """プロセス内で共有するセッション（TLS接続を URL 間で再利用する）"""
+    return create_session()
+
+def log_line(msg: str):
+    """ワーカースレッドからの出力が他の行と混ざらないよう、改行込みで1回で書き出す"""
+    sys.stdout.write(msg + "\n")
+
 def sha256_of_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
-def fetch(url: str, timeout=30):
-    """Fetch with GET and return the response plus content."""
-    s = create_session()
-    r = s.get(url, allow_redirects=True, timeout=timeout)
-    return r, r.content
+# ストリーミング取得で1回に読むバイト数
+DOWNLOAD_CHUNK_BYTES = 1 << 16
+
+def fetch_stream(url: str, timeout=30, session: Optional[requests.Session] = None, headers: Optional[dict] = None):
+    """GET with stream=True; the body is read later (r.content or save_stream)."""
+    s = session or get_session()
+    return s.get(url, allow_redirects=True, timeout=timeout, stream=True, headers=headers)
+
+def conditional_headers(known: Optional[tuple]) -> Optional[dict]:
+    """前回保存時の ETag / Last-Modified から条件付きGETのヘッダを作る"""
+    if not known:
+        return None
+    _, _, _, etag, last_modified = known
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers or None
 
-def guess_filename(url: str) -> str:
-    name = os.path.basename(urlparse(url).path) or "index"
+def save_stream(r: requests.Response, dest: Path) -> str:
+    """Write the response body to dest while hashing it; returns the sha256 hex digest.
+    一時ファイルに書いてから置き換えるので、途中で失敗しても dest に壊れたファイルは残らない。
+    """
+    hasher = hashlib.sha256()
+    tmp = dest.with_name(dest.name + ".part")
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in r.iter_content(DOWNLOAD_CHUNK_BYTES):
+                hasher.update(chunk)
+                f.write(chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return hasher.hexdigest()
+
+def guess_filename(url: str, parsed=None) -> str:
+    name = os.path.basename((parsed or urlparse(url)).path) or "index"
     # Remove query parameters if present
     name = name.split("?")[0]
     return name
@@ -75,36 +133,59 @@ def safe_filename(text: str) -> str:
 
 def normalize_text(txt: str) -> str:
     # heuristic cleanups for Japanese legal text
-    txt = txt.replace("\u3000", " ")            # full-width space -> half
-    txt = re.sub(r"[ \t]+", " ", txt)
+    # full-width space -> half, collapsing runs of spaces/tabs in the same pass
+    txt = re.sub(r"[ \t\u3000]+", " ", txt)
     txt = re.sub(r"\n{3,}", "\n\n", txt)
     return txt.strip()
 
 # Pre-compiled regex patterns for line merging (module-level for performance)
-_ART_HEADER_RE = re.compile(r"^\s*第[〇一二三四五六七八九十百千万0-9]+条\s*$")
-_ENUM_PAREN_RE = re.compile(r"^\s*[（(][0-9\uFF10-\uFF19一二三四五六七八九十]+[)）]\s*$")
-_ENUM_NUMSOLO_RE = re.compile(r"^\s*[0-9\uFF10-\uFF19]+\s*$")
 _ENUM_KATA_SOLO_RE = re.compile(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンイロハニホヘトチリヌルヲ]\s*$")
+# 条見出し・(1)・"2"・"ア" だけの行（見出し/列挙子の単独行）を1回の照合で判定する
+_HEADER_OR_ENUM_RE = re.compile(
+    r"^\s*(?:第[〇一二三四五六七八九十百千万0-9]+条"
+    r"|[（(][0-9\uFF10-\uFF19一二三四五六七八九十]+[)）]"
+    r"|[0-9\uFF10-\uFF19]+"
+    r"|[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンイロハニホヘトチリヌルヲ])\s*$"
+)
 _ENUM_KATA_END_RE = re.compile(r"[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン]$")
 _CROSS_REF_HEAD_RE = re.compile(
     r"^(?:同条|次条|本条|条例|規則)?第[0-9\uFF10-\uFF19〇一二三四五六七八九十百千万]+(条|項|号)"
     r"|^(?:前条|前項|同条|同項|各条|各項)\b"
 )
+_NEXT_KATA_PREFIX_RE = re.compile(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲ]")
+_CJK_PREFIX_RE = re.compile(r"^[\u4E00-\u9FFF]")
 _TOKEN_SOLO_RE = re.compile(r"^\s*(前項|同項|前条|同条)\s*$")
 _PAREN_BLOCK_RE = re.compile(r"^\s*[（(].*[)）]\s*$")
 _LONE_OPEN_RE = re.compile(r"^\s*[（(]\s*$")
 _LONE_CLOSE_RE = re.compile(r"^\s*[)）]\s*$")
 _CJK_SOLO_RE = re.compile(r"^\s*[\u4E00-\u9FFF]\s*$")
 _ID_RE = re.compile(r"^[A-Za-z]\d{6,}$")
-_EOS_PUNCT = set("。．.？！!？」』）)")
+_EOS_PUNCT = frozenset("。．.？！!？」』）)")
+# 条/項/号 で終わる行と、助詞・読点・括弧で始まる次の行をつなぐ
+_ARTICLE_END_CHARS = frozenset("条項号")
+_PARTICLE_HEAD = frozenset("のにをへとや及並、,(（")
+# 「、」で終わる行の次に来る参照語の先頭（前項/同条/次条/第/条例/規則/本条）
+_XREF_HEAD = frozenset("前同次第条規本")
+_TRAILING_MARKERS = frozenset({"条項目次", "体系情報", "沿革情報"})
+# cleanup_extracted_text の最後に順に適用する置換
+_FINAL_SUBS = [
+    (re.compile(p), r) for p, r in [
+        # 括弧の内側の空白（（ / ( の後ろ、） / ) の前）を1回の置換でまとめて除去
+        (r"([（(])\s+|\s+([)）])", r"\1\2"),
+        (r"(条|項|号)\s+([のにをへとや及び並び])", r"\1\2"),
+        (r"第\s*([0-9０-９〇一二三四五六七八九十百千万]+)\s*条\s+([のにをへとや及び並び])", r"第\1条\2"),
+    ]
+]
 
-def cleanup_extracted_text(text: str, url: str = "") -> str:
+def cleanup_extracted_text(text: str, url: str = "", light: bool = False) -> str:
     """Remove common noise blocks like TOC and internal IDs from ordinance pages.
     Heuristics target g-reiki style pages but are safe generically.
+    light=True skips the split-line merging (for trafilatura output, which has no
+    markup-induced line breaks) and only applies the cheap tidy-up passes.
     """
     lines = [ln.rstrip() for ln in text.splitlines()]
     # Drop trailing sections starting at known markers
-    markers = {"条項目次", "体系情報", "沿革情報"}
+    markers = _TRAILING_MARKERS
     cut_idx = None
     for i, ln in enumerate(lines):
         s = ln.strip()
@@ -118,34 +199,17 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
     lines = [ln for ln in lines if not _ID_RE.match(ln.strip())]
 
     # Merge common split lines caused by inline markup/newlines
-    def merge_splits(ls):
-        out = []
-        i = 0
+    def merge_splits(ls, start=0):
+        # ls[:start] は前回の走査で結合が起きないと分かっている行なのでそのまま使う
+        out = ls[:start]
+        i = start
         changed = False
         while i < len(ls):
             cur = ls[i]
             nxt = ls[i+1] if i+1 < len(ls) else None
             prv = out[-1] if out else None
-            # Join article header line with next
-            if nxt and _ART_HEADER_RE.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone enumerator like (1) with next
-            if nxt and _ENUM_PAREN_RE.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone paragraph number like "2" with next
-            if nxt and _ENUM_NUMSOLO_RE.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone katakana enumerator like "ア" with next
-            if nxt and _ENUM_KATA_SOLO_RE.match(cur) and nxt.strip():
+            # Join article header / standalone enumerator like 第1条, (1), "2", "ア" with next
+            if nxt and _HEADER_OR_ENUM_RE.match(cur) and nxt.strip():
                 out.append(cur.strip() + " " + nxt.lstrip())
                 i += 2
                 changed = True
@@ -161,7 +225,7 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
             if nxt:
                 prev_end = cur.rstrip()[-1:] if cur else ""
                 next_start = nxt.lstrip()[:1]
-                if prev_end in {"条","項","号"} and next_start in {"の","に","を","へ","と","や","及","並","、",",","(","（"}:
+                if prev_end in _ARTICLE_END_CHARS and next_start in _PARTICLE_HEAD:
                     out.append(cur.rstrip() + nxt.lstrip())
                     i += 2
                     changed = True
@@ -173,8 +237,12 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
                 changed = True
                 continue
             # Join parentheses blocks on their own line with previous
+            # 連続する括弧行は部品のリストに溜めて最後に1回だけ join する
             if _PAREN_BLOCK_RE.match(cur) and prv:
-                out[-1] = prv.rstrip() + cur.strip()
+                if prv.__class__ is list:
+                    prv.append(cur.strip())
+                else:
+                    out[-1] = [prv.rstrip(), cur.strip()]
                 i += 1
                 changed = True
                 continue
@@ -203,7 +271,7 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
                 changed = True
                 continue
             # If current ends with '次の' and next starts with katakana enumerator, join
-            if nxt and cur.rstrip().endswith("次の") and (_ENUM_KATA_SOLO_RE.match(nxt) or _ENUM_KATA_END_RE.match(nxt.lstrip()[-1:]) or re.match(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲ]", nxt)):
+            if nxt and cur.rstrip().endswith("次の") and (_ENUM_KATA_SOLO_RE.match(nxt) or _ENUM_KATA_END_RE.match(nxt.lstrip()[-1:]) or _NEXT_KATA_PREFIX_RE.match(nxt)):
                 out.append(cur.rstrip() + nxt.lstrip())
                 i += 2
                 changed = True
@@ -211,13 +279,13 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
             # If current ends with '、', join with next unless next is a new header/enumerator
             if nxt and cur.rstrip().endswith("、"):
                 next_stripped = nxt.strip()
-                if not (_ART_HEADER_RE.match(next_stripped) or _ENUM_PAREN_RE.match(next_stripped) or _ENUM_NUMSOLO_RE.match(next_stripped) or _ENUM_KATA_SOLO_RE.match(next_stripped)):
+                if not _HEADER_OR_ENUM_RE.match(next_stripped):
                     out.append(cur.rstrip() + next_stripped)
                     i += 2
                     changed = True
                     continue
             # If current ends with CJK and next starts with CJK and not sentence end, join
-            if nxt and cur and (cur[-1] not in _EOS_PUNCT) and _CJK_SOLO_RE.match(cur[-1]) and re.match(r"^[\u4E00-\u9FFF]", nxt.lstrip()):
+            if nxt and cur and (cur[-1] not in _EOS_PUNCT) and _CJK_SOLO_RE.match(cur[-1]) and _CJK_PREFIX_RE.match(nxt.lstrip()):
                 out.append(cur.rstrip() + nxt.lstrip())
                 i += 2
                 changed = True
@@ -241,19 +309,32 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
                 changed = True
                 continue
             # If current ends with '、' and next starts with cross-ref head like 前/同/次/第/条例/規則, join
-            if nxt and cur.rstrip().endswith("、") and nxt.lstrip()[:1] in {"前","同","次","第","条","規","本"}:
+            if nxt and cur.rstrip().endswith("、") and nxt.lstrip()[:1] in _XREF_HEAD:
                 out.append(cur.rstrip() + nxt.lstrip())
                 i += 2
                 changed = True
                 continue
             out.append(cur)
             i += 1
+        if changed:
+            out = ["".join(ln) if ln.__class__ is list else ln for ln in out]
         return out, changed
 
-    # Iteratively apply merge until stable
-    changed = True
+    # Iteratively apply merge until stable.
+    # 各行の判定は前後1行ずつしか見ないので、前回の走査で最初に変化した行の
+    # 1行手前から再走査すれば全体を走査し直した場合と同じ結果になる
+    start = 0
+    changed = not light
     while changed:
-        lines, changed = merge_splits(lines)
+        merged, changed = merge_splits(lines, start)
+        if changed:
+            # 変化していない行は同じ文字列オブジェクトのまま out に入る
+            first = start
+            n = min(len(merged), len(lines))
+            while first < n and merged[first] is lines[first]:
+                first += 1
+            start = max(first - 1, 0)
+        lines = merged
 
     # Remove duplicate consecutive empty lines and trim
     cleaned = []
@@ -266,50 +347,118 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
         prev_empty = is_empty
     text = "\n".join(cleaned).strip()
     # Inline tidy-up: collapse spaces around parentheses and after 条/項/号, and between 第..条 and particles
-    subs = [
-        (r"（\s+", "（"),
-        (r"\s+）", "）"),
-        (r"\(\s+", "("),
-        (r"\s+\)", ")"),
-        (r"(条|項|号)\s+([のにをへとや及び並び])", r"\1\2"),
-        (r"第\s*([0-9０-９〇一二三四五六七八九十百千万]+)\s*条\s+([のにをへとや及び並び])", r"第\1条\2"),
-    ]
-    for pat, rep in subs:
-        text = re.sub(pat, rep, text)
+    for pat, rep in _FINAL_SUBS:
+        text = pat.sub(rep, text)
     return text
 
-def extract_html_text(html_bytes: bytes, url: str) -> str:
-    # encoding detection
-    enc = chardet.detect(html_bytes).get("encoding") or "utf-8"
-    html = html_bytes.decode(enc, errors="replace")
+# 文字コード判定: HTTPヘッダ / <meta> の宣言を優先し、なければ chardet で推定する
+_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w\-]+)", re.I)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w\-]+)", re.I)
+# <meta> を探す先頭バイト数と、chardet に1回で渡すバイト数
+HEAD_SNIFF_BYTES = 4096
+CHARDET_CHUNK_BYTES = 4096
+
+def charset_from_content_type(content_type: str) -> Optional[str]:
+    """Content-Type ヘッダの charset パラメータを返す（なければ None）"""
+    m = _CHARSET_RE.search(content_type or "")
+    return m.group(1) if m else None
+
+# Python の codecs が知らない別名（WHATWG のラベル）
+_ENCODING_ALIASES = {"x-sjis": "cp932", "windows-31j": "cp932", "x-euc-jp": "euc_jp"}
+# Shift_JIS の宣言は厳密な shift_jis では機種依存文字（①、髙 など）が化けるので、その上位互換の cp932 で読む。
+# EUC-JP 側の NEC/IBM 拡張（cp51932 / eucJP-ms）に当たるコーデックは Python にないので euc_jp のまま
+_SUPERSET_ENCODINGS = {"shift_jis": "cp932"}
+
+def _known_encoding(enc) -> Optional[str]:
+    """宣言・推定された文字コード名を decode に使うコーデック名にする（不明なら None）
+
+    Examples:
+        >>> _known_encoding("Shift_JIS")
+        'cp932'
+        >>> _known_encoding(b"EUC-JP")
+        'euc_jp'
+    """
+    if not enc:
+        return None
+    if isinstance(enc, bytes):
+        enc = enc.decode("ascii", errors="ignore")
+    enc = _ENCODING_ALIASES.get(enc.strip().lower(), enc)
+    try:
+        name = codecs.lookup(enc).name
+    except LookupError:
+        return None
+    return _SUPERSET_ENCODINGS.get(name, name)
+
+def declared_encoding(html_bytes: bytes, declared_enc: Optional[str] = None) -> Optional[str]:
+    """BOM / HTTPヘッダ / <meta> で宣言された文字コード（なければ None）"""
+    if html_bytes.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    enc = _known_encoding(declared_enc)
+    if enc:
+        return enc
+    m = _META_CHARSET_RE.search(html_bytes, 0, HEAD_SNIFF_BYTES)
+    return _known_encoding(m.group(1)) if m else None
+
+def detect_encoding(html_bytes: bytes, declared_enc: Optional[str] = None) -> str:
+    """Pick the decoding for an HTML body without scanning all of it when possible."""
+    enc = declared_encoding(html_bytes, declared_enc)
+    if enc:
+        return enc
+    # chardet は確信が持てた時点で打ち切る（全体は渡さない）
+    try:
+        detector = chardet.UniversalDetector()
+        for start in range(0, len(html_bytes), CHARDET_CHUNK_BYTES):
+            detector.feed(html_bytes[start:start + CHARDET_CHUNK_BYTES])
+            if detector.done:
+                break
+        detector.close()
+        return _known_encoding(detector.result.get("encoding")) or "utf-8"
+    except Exception:
+        return "utf-8"
+
+def extract_html_text(html_bytes: bytes, url: str, declared_enc: Optional[str] = None) -> str:
+    return _extract_html_text(html_bytes, url, declared_enc)[0]
+
+def _extract_html_text(html_bytes: bytes, url: str, declared_enc: Optional[str] = None):
+    """extract_html_text の本体。(text, 実際に使った抽出方法) を返す"""
+    # 文字コードが宣言されていれば自前で decode する。宣言がなければ bytes のまま
+    # trafilatura に渡して推定を任せ、chardet と decode は BeautifulSoup に回すときだけ行う
+    enc = declared_encoding(html_bytes, declared_enc)
+    html = html_bytes.decode(enc, errors="replace") if enc else None
 
     if HAS_TRA:
         try:
-            main = trafilatura.extract(html, url=url, include_comments=False, include_links=False)
+            main = trafilatura.extract(html_bytes if html is None else html, url=url,
+                                       include_comments=False, include_links=False)
             if main and len(main) > 200:
-                return normalize_text(main)
+                return normalize_text(main), "trafilatura"
         except Exception:
             pass
 
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script","style","noscript","header","footer","nav"]):
+    if html is None:
+        html = html_bytes.decode(detect_encoding(html_bytes), errors="replace")
+    soup = BeautifulSoup(html, BS_PARSER)
+    for tag in soup.select("script,style,noscript,header,footer,nav"):
         tag.decompose()
     text = soup.get_text("\n")
     # collapse menu-like very short lines heuristic
     lines = [ln.strip() for ln in text.splitlines()]
     lines = [ln for ln in lines if ln]
     text = "\n".join(lines)
-    return normalize_text(text)
+    return normalize_text(text), "beautifulsoup"
 
-def extract_html_text_bs_only(html_bytes: bytes) -> str:
-    """BeautifulSoup-only extractor (bypass Trafilatura)."""
-    try:
-        enc = chardet.detect(html_bytes).get("encoding") or "utf-8"
-    except Exception:
-        enc = "utf-8"
+def extract_html_text_bs_only(html_bytes: bytes, declared_enc: Optional[str] = None) -> str:
+    """BeautifulSoup-only extractor (bypass Trafilatura).
+
+    Examples:
+        >>> page = "<html><head><meta charset='Shift_JIS'></head><body><p>①② 髙﨑</p></body></html>"
+        >>> extract_html_text_bs_only(page.encode("cp932"))
+        '①② 髙﨑'
+    """
+    enc = detect_encoding(html_bytes, declared_enc)
     html = html_bytes.decode(enc, errors="replace")
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script","style","noscript","header","footer","nav"]):
+    soup = BeautifulSoup(html, BS_PARSER)
+    for tag in soup.select("script,style,noscript,header,footer,nav"):
         tag.decompose()
     text = soup.get_text("\n")
     lines = [ln.strip() for ln in text.splitlines()]
@@ -317,33 +466,59 @@ def extract_html_text_bs_only(html_bytes: bytes) -> str:
     text = "\n".join(lines)
     return normalize_text(text)
 
+# 本文に含めない要素（の中のテキスト）。extract_html_text_bs_only で除去する要素と同じ
+_NOISE_FREE_TEXT_XPATH = (
+    "//text()[not(ancestor::script or ancestor::style or ancestor::noscript"
+    " or ancestor::header or ancestor::footer or ancestor::nav)]"
+)
+
+def extract_html_text_lxml(html_bytes: bytes, declared_enc: Optional[str] = None) -> str:
+    """extract_html_text_bs_only と同じ結果を lxml だけで得る（g-reiki.net 用）。
+    BeautifulSoup の木を作らずに済むぶん速い。解析できなければ BeautifulSoup に任せる。
+    """
+    enc = detect_encoding(html_bytes, declared_enc)
+    html = html_bytes.decode(enc, errors="replace")
+    try:
+        root = lxml.html.document_fromstring(html)
+    except Exception:
+        return extract_html_text_bs_only(html_bytes, declared_enc)
+    lines = [ln.strip() for ln in "\n".join(root.xpath(_NOISE_FREE_TEXT_XPATH)).splitlines()]
+    return normalize_text("\n".join(ln for ln in lines if ln))
+
+PDF_MIN_TEXT_CHARS = 200
+
+def _fitz_text(path: Path) -> Optional[str]:
+    """PyMuPDF でページ順にテキストを取り出す（使えない/失敗したら None）"""
+    if not HAS_FITZ:
+        return None
+    try:
+        with fitz.open(path) as doc:
+            return "\n".join(page.get_text("text", sort=True) for page in doc)
+    except Exception:
+        return None
+
 def pdf_text_fast(path: Path) -> str:
-    """Try pdfminer first; if too short, try PyMuPDF blocks with sort."""
+    """Try PyMuPDF first (C library); fall back to pdfminer when it yields too little text."""
+    t2 = _fitz_text(path)
+    if t2 is not None and len(t2.strip()) >= PDF_MIN_TEXT_CHARS:
+        return normalize_text(t2)
     try:
         t = pdf_extract_text(str(path)) or ""
     except Exception:
         t = ""
-    if len(t.strip()) >= 200:
+    if len(t.strip()) >= PDF_MIN_TEXT_CHARS or t2 is None:
         return normalize_text(t)
-    # try PyMuPDF if available
-    if HAS_FITZ:
-        try:
-            doc = fitz.open(path)
-            blocks = []
-            for page in doc:
-                blocks.append(page.get_text("text", sort=True))
-            t2 = "\n".join(blocks)
-            return normalize_text(t2)
-        except Exception:
-            pass
-    return normalize_text(t)
+    # どちらも短い場合は従来どおり PyMuPDF の結果を返す
+    return normalize_text(t2)
 
 def is_scanned_pdf(path: Path, char_threshold=200) -> bool:
     """Heuristic: extract text and count; scanned PDFs usually yield near zero."""
     txt = pdf_text_fast(path)
     return len(txt) < char_threshold
 
+@lru_cache(maxsize=1)
 def ocrmypdf_available() -> bool:
+    """ocrmypdf が使えるか（プロセス内で1回だけ確認する）"""
     try:
         subprocess.run(["ocrmypdf","--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
         return True
@@ -363,7 +538,7 @@ def run_ocrmypdf(in_pdf: Path, out_pdf: Path, lang="jpn+eng"):
     ]
     subprocess.run(cmd, check=True)
 
-def build_output_basename(meta: dict, url: str) -> str:
+def build_output_basename(meta: dict, url: str, parsed=None) -> str:
     impl_id = meta.get("implementation_date_id")
     municipality = meta.get("municipality", "")
     doc_kind = meta.get("doc_kind", "")
@@ -375,18 +550,23 @@ def build_output_basename(meta: dict, url: str) -> str:
     if doc_kind:
         parts.append(doc_kind)
     if not parts:
-        parts.append(guess_filename(url))
+        parts.append(guess_filename(url, parsed))
     return safe_filename("_".join(parts))
 
-def process_url(url: str, meta: dict):
-    fname_base = build_output_basename(meta, url)
-    overwrite = os.getenv("OVERWRITE", "0") == "1"
+def process_url(url: str, meta: dict, known: Optional[tuple] = None):
+    """known: 前回保存したファイルの (file_kind, path, bytes_sha256, etag, last_modified)。
+    指定されていれば条件付きGETを行い、304 なら保存済みのファイルをそのまま使う。
+    変更されていれば取り直して上書きする。
+    """
+    parsed = urlparse(url)  # URL の分解はここで1回だけ行う
+    fname_base = build_output_basename(meta, url, parsed)
+    overwrite = os.getenv("OVERWRITE", "0") == "1" or known is not None
     pdf_by_ext = url.lower().endswith(".pdf")
     out_pdf = PDF_DIR / f"{fname_base}.pdf"
     out_txt = OUT_DIR / f"{fname_base}.txt"
 
     if pdf_by_ext and out_pdf.exists() and not overwrite:
-        print(f"    [SKIP] Already exists: {out_pdf}")
+        log_line(f"    [SKIP] Already exists: {out_pdf}")
         return {
             "url": url,
             "municipality": meta.get("municipality", ""),
@@ -397,17 +577,36 @@ def process_url(url: str, meta: dict):
             "method": "already_exists"
         }
 
-    r, body = fetch(url)
+    r = fetch_stream(url, headers=conditional_headers(known))
+    if r.status_code == 304:
+        # 前回から変わっていない: 取得も抽出もせず保存済みのファイルを使う
+        r.close()
+        file_kind, path, sha, etag, last_modified = known
+        log_line(f"    [SKIP] Not modified: {path}")
+        return {
+            "url": url,
+            "output_pdf" if file_kind == "pdf" else "output_txt": path,
+            "bytes_sha256": sha,
+            "etag": etag,
+            "last_modified": last_modified,
+            "status": "skipped",
+            "method": "not_modified"
+        }
     if r.status_code >= 400:
+        r.close()
         raise Exception(f"HTTP {r.status_code} fetching {url}")
-    ct = r.headers.get("content-type","").split(";")[0].lower()
+    ct_header = r.headers.get("content-type","")
+    ct = ct_header.split(";")[0].lower()
     is_pdf = pdf_by_ext or ("pdf" in ct)
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
 
-    now = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
 
     if is_pdf:
         if out_pdf.exists() and not overwrite:
-            print(f"    [SKIP] Already exists: {out_pdf}")
+            r.close()
+            log_line(f"    [SKIP] Already exists: {out_pdf}")
             return {
                 "url": url,
                 "municipality": meta.get("municipality", ""),
@@ -418,8 +617,8 @@ def process_url(url: str, meta: dict):
                 "method": "already_exists"
             }
 
-        pdf_hash = sha256_of_bytes(body)
-        out_pdf.write_bytes(body)
+        # 本文をメモリに溜めず、ハッシュを計算しながらそのまま保存する
+        pdf_hash = save_stream(r, out_pdf)
         return {
             "url": url,
             "content_type": ct,
@@ -427,10 +626,13 @@ def process_url(url: str, meta: dict):
             "method": "pdf_download",
             "bytes_sha256": pdf_hash,
             "output_pdf": str(out_pdf),
+            "etag": etag,
+            "last_modified": last_modified,
         }
 
     if out_txt.exists() and not overwrite:
-        print(f"    [SKIP] Already exists: {out_txt}")
+        r.close()
+        log_line(f"    [SKIP] Already exists: {out_txt}")
         return {
             "url": url,
             "municipality": meta.get("municipality", ""),
@@ -441,6 +643,8 @@ def process_url(url: str, meta: dict):
             "method": "already_exists"
         }
 
+    body = r.content
+
     record = {
         "url": url,
         "content_type": ct,
@@ -448,22 +652,29 @@ def process_url(url: str, meta: dict):
         "method": None,
         "bytes_sha256": None,
         "output_txt": None,
+        "etag": etag,
+        "last_modified": last_modified,
     }
     rec_hash = sha256_of_bytes(body)
     record["bytes_sha256"] = rec_hash
+    declared_enc = charset_from_content_type(ct_header)
     # Choose extraction path
-    netloc = urlparse(url).netloc.lower()
+    netloc = parsed.netloc.lower()
     force_bs = os.getenv("FORCE_BS", "0") == "1"
     force_tra = os.getenv("FORCE_TRA", "0") == "1"
     use_bs = force_bs or (("g-reiki.net" in netloc) and not force_tra)
-    if use_bs:
-        text = extract_html_text_bs_only(body)
+    if use_bs and HAS_LXML and not force_bs:
+        # g-reiki.net は定型のページなので lxml で直接テキストを取り出す
+        text = extract_html_text_lxml(body, declared_enc)
+        method_used = "beautifulsoup"
+    elif use_bs:
+        text = extract_html_text_bs_only(body, declared_enc)
         method_used = "beautifulsoup"
     else:
-        text = extract_html_text(body, url)
-        method_used = "trafilatura" if HAS_TRA else "beautifulsoup"
+        text, method_used = _extract_html_text(body, url, declared_enc)
     # Common cleanup
-    text = cleanup_extracted_text(text, url)
+    # trafilatura の出力は行の分断がないので、行結合を省いた軽い整形だけにする
+    text = cleanup_extracted_text(text, url, light=(method_used == "trafilatura"))
     out_txt.write_text(text, encoding="utf-8")
     record["method"] = method_used
     record["output_txt"] = str(out_txt)
@@ -493,6 +704,8 @@ def init_ordinance_files_table(conn: sqlite3.Connection):
             bytes_sha256 TEXT,
             extract_method TEXT,
             fetched_at TEXT,
+            etag TEXT,
+            last_modified TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY(municipality_id) REFERENCES municipalities(id),
             FOREIGN KEY(ordinance_id) REFERENCES ordinances(id),
@@ -501,6 +714,11 @@ def init_ordinance_files_table(conn: sqlite3.Connection):
         )
         """
     )
+    # 以前のスキーマで作られたテーブルには条件付きGET用の列を追加する
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(ordinance_files)")}
+    for column in ("etag", "last_modified"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE ordinance_files ADD COLUMN {column} TEXT")
     conn.commit()
 
 def select_best_implementation_date(conn: sqlite3.Connection, ordinance_id: int):
@@ -545,44 +763,76 @@ def fetch_ordinances(conn: sqlite3.Connection, limit: Optional[int]):
         params = (limit,)
     return conn.execute(query, params).fetchall()
 
-def record_output_file(conn: sqlite3.Connection, meta: dict, rec: dict, file_kind: str, path: str):
-    conn.execute(
-        """
-        INSERT INTO ordinance_files (
-            municipality_id,
-            ordinance_id,
-            implementation_date_id,
-            file_kind,
-            path,
-            source_url,
-            bytes_sha256,
-            extract_method,
-            fetched_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(ordinance_id, file_kind, implementation_date_id)
-        DO UPDATE SET
-            municipality_id=excluded.municipality_id,
-            path=excluded.path,
-            source_url=excluded.source_url,
-            bytes_sha256=excluded.bytes_sha256,
-            extract_method=excluded.extract_method,
-            fetched_at=excluded.fetched_at
-        """,
-        (
-            meta["municipality_id"],
-            meta["ordinance_id"],
-            meta["implementation_date_id"],
-            file_kind,
-            path,
-            rec.get("url"),
-            rec.get("bytes_sha256"),
-            rec.get("method"),
-            rec.get("fetched_at"),
-        ),
+_ORDINANCE_FILES_UPSERT = """
+    INSERT INTO ordinance_files (
+        municipality_id,
+        ordinance_id,
+        implementation_date_id,
+        file_kind,
+        path,
+        source_url,
+        bytes_sha256,
+        extract_method,
+        fetched_at,
+        etag,
+        last_modified
     )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ordinance_id, file_kind, implementation_date_id)
+    DO UPDATE SET
+        municipality_id=excluded.municipality_id,
+        path=excluded.path,
+        source_url=excluded.source_url,
+        bytes_sha256=excluded.bytes_sha256,
+        extract_method=excluded.extract_method,
+        fetched_at=excluded.fetched_at,
+        etag=COALESCE(excluded.etag, ordinance_files.etag),
+        last_modified=COALESCE(excluded.last_modified, ordinance_files.last_modified)
+"""
+# ordinance_files への書き込みをまとめる件数
+FILE_BATCH_SIZE = 256
+
+def output_file_params(meta: dict, rec: dict, file_kind: str, path: str) -> tuple:
+    return (
+        meta["municipality_id"],
+        meta["ordinance_id"],
+        meta["implementation_date_id"],
+        file_kind,
+        path,
+        rec.get("url"),
+        rec.get("bytes_sha256"),
+        rec.get("method"),
+        rec.get("fetched_at"),
+        rec.get("etag"),
+        rec.get("last_modified"),
+    )
+
+def load_known_files(conn: sqlite3.Connection) -> dict:
+    """source_url -> (file_kind, path, bytes_sha256, etag, last_modified) of files saved by earlier runs."""
+    return {
+        row["source_url"]: (
+            row["file_kind"], row["path"], row["bytes_sha256"], row["etag"], row["last_modified"]
+        )
+        for row in conn.execute(
+            "SELECT source_url, file_kind, path, bytes_sha256, etag, last_modified FROM ordinance_files "
+            "WHERE source_url IS NOT NULL ORDER BY id"
+        )
+    }
 
-def process_db(conn: sqlite3.Connection, db_path: Path, limit: Optional[int]):
+def existing_output_record(url: str, file_kind: str, path: str, sha: Optional[str],
+                           etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+    log_line(f"    [SKIP] Already exists: {path}")
+    return {
+        "url": url,
+        "output_pdf" if file_kind == "pdf" else "output_txt": path,
+        "bytes_sha256": sha,
+        "etag": etag,
+        "last_modified": last_modified,
+        "status": "skipped",
+        "method": "already_exists"
+    }
+
+def process_db(conn: sqlite3.Connection, db_path: Path, limit: Optional[int], workers: int = DEFAULT_WORKERS):
     print(f"\n{'='*60}")
     print(f"Processing DB: {db_path}")
     print(f"Output directory: {OUT_DIR}")
@@ -598,86 +848,54 @@ def process_db(conn: sqlite3.Connection, db_path: Path, limit: Optional[int]):
     skip_count = 0
     error_count = 0
 
-    with open(index_path, "w", encoding="utf-8") as w:
-        for idx, row in enumerate(rows, 1):
-            url = (row["url"] or "").strip()
-            if not url.startswith("http"):
-                error_count += 1
-                rec = {
-                    "url": url,
-                    "municipality": row["municipality_name"],
-                    "prefecture": row["prefecture_name"],
-                    "doc_kind": "条例",
-                    "ordinance_id": row["ordinance_id"],
-                    "municipality_id": row["municipality_id"],
-                    "ordinance_name": row["ordinance_name"],
-                    "enactment_year": row["enactment_year"],
-                    "error": "invalid_url",
-                }
-                w.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                print(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> invalid_url")
-                continue
-
-            impl = select_best_implementation_date(conn, row["ordinance_id"])
-            if impl is None:
-                error_count += 1
-                rec = {
-                    "url": url,
-                    "municipality": row["municipality_name"],
-                    "prefecture": row["prefecture_name"],
-                    "doc_kind": "条例",
-                    "ordinance_id": row["ordinance_id"],
-                    "municipality_id": row["municipality_id"],
-                    "ordinance_name": row["ordinance_name"],
-                    "enactment_year": row["enactment_year"],
-                    "error": "implementation_date_not_found",
-                }
-                w.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                print(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> implementation_date_not_found")
-                continue
+    # 取得・抽出はスレッドで並列に行い、index.jsonl と DB への書き込みはこのスレッドだけで行う
+    with open(index_path, "w", encoding="utf-8") as w, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futures = {}
+        inflight = {}
+        pending_files = []
+        try:
+            overwrite = os.getenv("OVERWRITE", "0") == "1"
+            revalidate = os.getenv("REVALIDATE", "0") == "1"
+            known_files = load_known_files(conn)
+            for idx, row in enumerate(rows, 1):
+                url = (row["url"] or "").strip()
+                if not url.startswith("http"):
+                    error_count += 1
+                    rec = {
+                        "url": url,
+                        "municipality": row["municipality_name"],
+                        "prefecture": row["prefecture_name"],
+                        "doc_kind": "条例",
+                        "ordinance_id": row["ordinance_id"],
+                        "municipality_id": row["municipality_id"],
+                        "ordinance_name": row["ordinance_name"],
+                        "enactment_year": row["enactment_year"],
+                        "error": "invalid_url",
+                    }
+                    w.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    log_line(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> invalid_url")
+                    continue
 
-            meta = {
-                "municipality": row["municipality_name"],
-                "prefecture": row["prefecture_name"],
-                "doc_kind": "条例",
-                "ordinance_id": row["ordinance_id"],
-                "municipality_id": row["municipality_id"],
-                "implementation_date_id": impl["id"],
-                "ordinance_name": row["ordinance_name"],
-                "enactment_year": row["enactment_year"],
-            }
+                impl = select_best_implementation_date(conn, row["ordinance_id"])
+                if impl is None:
+                    error_count += 1
+                    rec = {
+                        "url": url,
+                        "municipality": row["municipality_name"],
+                        "prefecture": row["prefecture_name"],
+                        "doc_kind": "条例",
+                        "ordinance_id": row["ordinance_id"],
+                        "municipality_id": row["municipality_id"],
+                        "ordinance_name": row["ordinance_name"],
+                        "enactment_year": row["enactment_year"],
+                        "error": "implementation_date_not_found",
+                    }
+                    w.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    log_line(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> implementation_date_not_found")
+                    continue
 
-            try:
-                rec = process_url(url, meta)
-                rec["municipality"] = row["municipality_name"]
-                rec["prefecture"] = row["prefecture_name"]
-                rec["doc_kind"] = "条例"
-                rec["ordinance_id"] = row["ordinance_id"]
-                rec["municipality_id"] = row["municipality_id"]
-                rec["implementation_date_id"] = impl["id"]
-                rec["implementation_date"] = impl["implementation_date"]
-                rec["implementation_description"] = impl["description"]
-                rec["ordinance_name"] = row["ordinance_name"]
-                rec["enactment_year"] = row["enactment_year"]
-
-                if rec.get("status") == "skipped":
-                    skip_count += 1
-                    output_file = rec.get("output_pdf") or rec.get("output_txt", "N/A")
-                    print(f"[{idx}/{total}] [SKIP] {row['municipality_name']} (条例) -> {output_file}")
-                else:
-                    success_count += 1
-                    output_file = rec.get("output_pdf") or rec.get("output_txt", "N/A")
-                    print(f"[{idx}/{total}] [OK] {row['municipality_name']} (条例) -> {output_file} ({rec.get('method')})")
-
-                file_kind = "pdf" if rec.get("output_pdf") else "html_text"
-                out_path = rec.get("output_pdf") or rec.get("output_txt")
-                if out_path:
-                    record_output_file(conn, meta, rec, file_kind, out_path)
-                w.write(json.dumps(rec, ensure_ascii=False) + "\n")
-            except Exception as e:
-                error_count += 1
-                rec = {
-                    "url": url,
+                meta = {
                     "municipality": row["municipality_name"],
                     "prefecture": row["prefecture_name"],
                     "doc_kind": "条例",
@@ -686,11 +904,91 @@ def process_db(conn: sqlite3.Connection, db_path: Path, limit: Optional[int]):
                     "implementation_date_id": impl["id"],
                     "ordinance_name": row["ordinance_name"],
                     "enactment_year": row["enactment_year"],
-                    "error": str(e),
                 }
-                w.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                print(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> {e}")
+                entry = (idx, row, impl, meta, url)
+                if url in inflight:
+                    # 同じURLは1回だけ取得し、結果を共有する
+                    futures[inflight[url]].append(entry)
+                    continue
+                known = known_files.get(url)
+                if known is not None and not Path(known[1]).exists():
+                    known = None
+                if known is not None and not overwrite and not revalidate:
+                    # 以前の実行で保存済みのファイルがあれば取得しない
+                    future = Future()
+                    future.set_result(existing_output_record(url, *known))
+                else:
+                    # REVALIDATE 時は条件付きGETで変更の有無を確かめ、変わったものだけ取り直す。
+                    # OVERWRITE 時は抽出をやり直すため、条件を付けずに必ず取り直す
+                    future = ex.submit(process_url, url, meta, None if overwrite else known)
+                inflight[url] = future
+                futures[future] = [entry]
+
+            # 完了した順に結果を記録する
+            for future in as_completed(futures):
+                for k, (idx, row, impl, meta, url) in enumerate(futures[future]):
+                    try:
+                        rec = future.result()
+                        if k:
+                            # 先頭の行と同じファイルを共有する重複URL
+                            rec = dict(rec, status="skipped")
+                        rec["municipality"] = row["municipality_name"]
+                        rec["prefecture"] = row["prefecture_name"]
+                        rec["doc_kind"] = "条例"
+                        rec["ordinance_id"] = row["ordinance_id"]
+                        rec["municipality_id"] = row["municipality_id"]
+                        rec["implementation_date_id"] = impl["id"]
+                        rec["implementation_date"] = impl["implementation_date"]
+                        rec["implementation_description"] = impl["description"]
+                        rec["ordinance_name"] = row["ordinance_name"]
+                        rec["enactment_year"] = row["enactment_year"]
+
+                        if rec.get("status") == "skipped":
+                            skip_count += 1
+                            output_file = rec.get("output_pdf") or rec.get("output_txt", "N/A")
+                            log_line(f"[{idx}/{total}] [SKIP] {row['municipality_name']} (条例) -> {output_file}")
+                        else:
+                            success_count += 1
+                            output_file = rec.get("output_pdf") or rec.get("output_txt", "N/A")
+                            log_line(f"[{idx}/{total}] [OK] {row['municipality_name']} (条例) -> {output_file} ({rec.get('method')})")
+
+                        file_kind = "pdf" if rec.get("output_pdf") else "html_text"
+                        out_path = rec.get("output_pdf") or rec.get("output_txt")
+                        if out_path:
+                            pending_files.append(output_file_params(meta, rec, file_kind, out_path))
+                            if len(pending_files) >= FILE_BATCH_SIZE:
+                                conn.executemany(_ORDINANCE_FILES_UPSERT, pending_files)
+                                pending_files.clear()
+                        w.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    except Exception as e:
+                        error_count += 1
+                        rec = {
+                            "url": url,
+                            "municipality": row["municipality_name"],
+                            "prefecture": row["prefecture_name"],
+                            "doc_kind": "条例",
+                            "ordinance_id": row["ordinance_id"],
+                            "municipality_id": row["municipality_id"],
+                            "implementation_date_id": impl["id"],
+                            "ordinance_name": row["ordinance_name"],
+                            "enactment_year": row["enactment_year"],
+                            "error": str(e),
+                        }
+                        w.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                        log_line(f"[{idx}/{total}] [ERR] {row['municipality_name']} (条例) {url} -> {e}")
+        except BaseException:
+            # Ctrl-C などで中断したら、まだ始まっていない取得は捨てて（実行中の分だけ待つ）
+            # それまでに記録した分を DB に書き込んでから抜ける
+            ex.shutdown(wait=False, cancel_futures=True)
+            if pending_files:
+                conn.executemany(_ORDINANCE_FILES_UPSERT, pending_files)
+            conn.commit()
+            raise
+
+        if pending_files:
+            conn.executemany(_ORDINANCE_FILES_UPSERT, pending_files)
 
+    # 全件を1トランザクションで書き込み、最後に1回だけコミットする
     conn.commit()
     print(f"\nCompleted processing DB")
     print(f"  Success: {success_count}")
@@ -700,7 +998,7 @@ def process_db(conn: sqlite3.Connection, db_path: Path, limit: Optional[int]):
 
     return success_count, skip_count, error_count, total
 
-def main(db_path=DB_PATH, limit: Optional[int] = None):
+def main(db_path=DB_PATH, limit: Optional[int] = None, workers: int = DEFAULT_WORKERS):
     """メイン処理関数"""
     print(f"Starting web_fetch.py...")
 
@@ -713,9 +1011,12 @@ def main(db_path=DB_PATH, limit: Optional[int] = None):
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     init_ordinance_files_table(conn)
     try:
-        process_db(conn, db_path, limit)
+        process_db(conn, db_path, limit, workers)
     finally:
         conn.close()
 
@@ -728,11 +1029,13 @@ if __name__ == "__main__":
   python web_fetch.py
   python web_fetch.py --db-path data/ordinance_data.db
   python web_fetch.py --limit 10
+  python web_fetch.py --workers 1
         """
     )
     parser.add_argument("--db-path", type=str, default=str(DB_PATH), help="SQLite DBのパス")
     parser.add_argument("--limit", type=int, default=None, help="テスト用に先頭N件のみ処理")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="並列に取得するURL数（1で逐次処理）")
     
     args = parser.parse_args()
 
-    main(db_path=args.db_path, limit=args.limit)
+    main(db_path=args.db_path, limit=args.limit, workers=args.workers)
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, re, csv, json, time, hashlib, mimetypes, subprocess, tempfile, argparse, sys, glob
+import os, re, csv, json, time, hashlib, mimetypes, subprocess, tempfile, argparse, sys, codecs
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+from functools import lru_cache
+from itertools import chain
+from typing import Optional
 from pathlib import Path
 from urllib.parse import urlparse
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.ssl_ import create_urllib3_context
+from urllib3.util.retry import Retry
 import chardet
 from bs4 import BeautifulSoup
 
@@ -17,6 +24,34 @@ try:
 except Exception:
     HAS_TRA = False
 
+# Optional: 再実行時に取得済みのページを使い回す HTTP キャッシュ（HTTP_CACHE=1 で有効）
+try:
+    import requests_cache
+    HAS_REQUESTS_CACHE = True
+except Exception:
+    HAS_REQUESTS_CACHE = False
+
+# BeautifulSoup は lxml があればそちらで解析する（html.parser より速い）
+try:
+    import lxml.html
+    HAS_LXML = True
+    BS_PARSER = "lxml"
+except Exception:
+    HAS_LXML = False
+    BS_PARSER = "html.parser"
+
+# 文字コード推定: C 実装の cchardet、なければ charset_normalizer を使う（最後は chardet）
+try:
+    import cchardet
+    HAS_CCHARDET = True
+except Exception:
+    HAS_CCHARDET = False
+try:
+    from charset_normalizer import from_bytes as charset_from_bytes
+    HAS_CHARSET_NORMALIZER = True
+except Exception:
+    HAS_CHARSET_NORMALIZER = False
+
 # PDF text extractors
 from pdfminer.high_level import extract_text as pdf_extract_text
 try:
@@ -41,30 +76,119 @@ class SSLAdapter(HTTPAdapter):
         kwargs['ssl_context'] = ctx
         return super().init_poolmanager(*args, **kwargs)
 
+# keep-alive で使い回す接続数
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 64
+
+def _retry_policy():
+    # 一時的なエラーだけ再試行し、最後の応答はそのまま返す
+    return Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                 raise_on_status=False)
+
+# HTTP キャッシュの保存先（SQLite）と有効期間
+HTTP_CACHE_NAME = ".web_fetch_cache"
+HTTP_CACHE_EXPIRE = timedelta(days=7)
+
+def _cacheable(response) -> bool:
+    # PDF は大きいのでキャッシュせず、保存済みファイルの有無で判断する
+    ct = response.headers.get("content-type", "").lower()
+    return "pdf" not in ct and not response.url.lower().endswith(".pdf")
+
 def create_session():
     """Create a requests session with custom SSL adapter."""
-    s = requests.Session()
-    s.mount('https://', SSLAdapter())
+    if HAS_REQUESTS_CACHE and os.getenv("HTTP_CACHE", "0") == "1":
+        s = requests_cache.CachedSession(
+            cache_name=HTTP_CACHE_NAME,
+            backend="sqlite",
+            expire_after=HTTP_CACHE_EXPIRE,
+            allowable_methods=("GET", "HEAD"),
+            stale_if_error=True,
+            filter_fn=_cacheable,
+        )
+    else:
+        s = requests.Session()
+    s.mount('https://', SSLAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                   max_retries=_retry_policy()))
+    s.mount('http://', HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                   max_retries=_retry_policy()))
     s.headers.update(HEADERS)
     return s
 
+@lru_cache(maxsize=None)
+def get_session():
+    """プロセス内で共有するセッション（TLS接続を URL 間で再利用する）"""
+    return create_session()
+
+# 同時に取得するURL数と、1ホストあたりの同時接続数
+DEFAULT_WORKERS = 16
+PER_HOST_LIMIT = 4
+# index.jsonl を何件ごとにディスクへ書き出すか（強制終了で失うのは最大でこの件数分）
+INDEX_FLUSH_RECORDS = 50
+
+def run_by_host(ex, items, run, workers, per_host=PER_HOST_LIMIT):
+    """items = [(idx, entry, parsed), ...] を ex で実行し、完了した順に (future, idx, entry) を返す。
+    同時に投入するのは workers 件まで、1ホストあたり per_host 件までとし、空きが出たら
+    ホストを順に回して次を投入する（スレッドをホスト待ちでふさがず、中断時に捨てる分も少なくて済む）。
+    """
+    queues = {}
+    for item in items:
+        queues.setdefault(item[2].netloc, deque()).append(item)
+    ready = deque(queues)  # 未投入のエントリがあり、同時接続数に空きのあるホスト
+    running = Counter()
+    futures = {}
+    while futures or ready:
+        while ready and len(futures) < workers:
+            host = ready.popleft()
+            idx, entry, parsed = queues[host].popleft()
+            running[host] += 1
+            futures[ex.submit(run, entry, parsed)] = (idx, entry, host)
+            if queues[host] and running[host] < per_host:
+                ready.append(host)
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx, entry, host = futures.pop(future)
+            running[host] -= 1
+            # 上限に達して ready から外れていたホストは、空きができたので戻す
+            if queues[host] and running[host] == per_host - 1:
+                ready.append(host)
+            yield future, idx, entry
+
+def log_line(msg: str):
+    """ワーカースレッドからの出力が他の行と混ざらないよう、改行込みで1回で書き出す"""
+    sys.stdout.write(msg + "\n")
+
 def sha256_of_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
-def fetch(url: str, timeout=30):
-    """Fetch with HEAD fallback to GET if HEAD not allowed."""
-    s = create_session()
+# ストリーミング取得で1回に読むバイト数
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+
+def fetch_stream(url: str, timeout=30, session: Optional[requests.Session] = None):
+    """GET with stream=True; the body is written later by save_stream."""
+    s = session or get_session()
+    return s.get(url, allow_redirects=True, timeout=timeout, stream=True)
+
+def save_stream(r: requests.Response, dest: Path) -> str:
+    """Write the response body to dest while hashing it; returns the sha256 hex digest.
+    一時ファイルに書いてから置き換えるので、途中で失敗しても dest に壊れたファイルは残らない。
+    """
+    hasher = hashlib.sha256()
+    tmp = dest.with_name(dest.name + ".part")
     try:
-        r = s.head(url, allow_redirects=True, timeout=timeout)
-        if r.status_code >= 400 or ("text/html" in r.headers.get("content-type","").lower() and int(r.headers.get("content-length","0") or 0) == 0):
-            raise Exception("HEAD not usable, try GET")
-        return r, None
-    except Exception:
-        r = s.get(url, allow_redirects=True, timeout=timeout)
-        return r, r.content  # when GET was used, return content too
+        with open(tmp, "wb") as f:
+            for chunk in r.iter_content(DOWNLOAD_CHUNK_BYTES):
+                hasher.update(chunk)
+                f.write(chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        r.close()
+    return hasher.hexdigest()
 
-def guess_filename(url: str) -> str:
-    name = os.path.basename(urlparse(url).path) or "index"
+def guess_filename(url: str, parsed=None) -> str:
+    name = os.path.basename((parsed or urlparse(url)).path) or "index"
     # Remove query parameters if present
     name = name.split("?")[0]
     return name
@@ -77,13 +201,56 @@ def safe_filename(text: str) -> str:
     text = re.sub(r'_+', '_', text)
     return text.strip('_')
 
+# 全角スペース・半角スペース・タブの連続を1回の置換で半角スペース1つにまとめる
+_SPACE_RUN_RE = re.compile(r"[ \t\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
 def normalize_text(txt: str) -> str:
     # heuristic cleanups for Japanese legal text
-    txt = txt.replace("\u3000", " ")            # full-width space -> half
-    txt = re.sub(r"[ \t]+", " ", txt)
-    txt = re.sub(r"\n{3,}", "\n\n", txt)
+    # full-width space -> half, collapsing runs of spaces/tabs in the same pass
+    txt = _SPACE_RUN_RE.sub(" ", txt)
+    txt = _BLANK_LINES_RE.sub("\n\n", txt)
     return txt.strip()
 
+# Pre-compiled regex patterns for line merging (module-level for performance)
+# 条見出し・(1)・"2"・"ア" だけの行（見出し/列挙子の単独行）を1回の照合で判定する
+_HEADER_OR_ENUM_RE = re.compile(
+    r"^\s*(?:第[〇一二三四五六七八九十百千万0-9]+条"
+    r"|[（(][0-9０-９一二三四五六七八九十]+[)）]"
+    r"|[0-9０-９]+"
+    r"|[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンイロハニホヘトチリヌルヲ])\s*$"
+)
+_ENUM_KATA_SOLO_RE = re.compile(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンイロハニホヘトチリヌルヲ]\s*$")
+_CROSS_REF_HEAD_RE = re.compile(
+    r"^(?:同条|次条|本条|条例|規則)?第[0-9０-９〇一二三四五六七八九十百千万]+(条|項|号)"
+    r"|^(?:前条|前項|同条|同項|各条|各項)\b"
+)
+_NEXT_KATA_PREFIX_RE = re.compile(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲ]")
+_TOKEN_SOLO_RE = re.compile(r"^\s*(前項|同項|前条|同条)\s*$")
+_PAREN_BLOCK_RE = re.compile(r"^\s*[（(].*[)）]\s*$")
+_LONE_OPEN_RE = re.compile(r"^\s*[（(]\s*$")
+_LONE_CLOSE_RE = re.compile(r"^\s*[)）]\s*$")
+_CJK_SOLO_RE = re.compile(r"^\s*[\u4E00-\u9FFF]\s*$")
+_CJK_PREFIX_RE = re.compile(r"^[\u4E00-\u9FFF]")
+_ID_RE = re.compile(r"^[A-Za-z]\d{6,}$")
+_EOS_PUNCT = frozenset("。．.？！!？」』)）]")
+# 行末・行頭の1文字で判定できる規則の文字集合
+_KATA_END_CHARS = frozenset("アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン")
+_ARTICLE_END_CHARS = frozenset("条項号")
+_PARTICLE_HEAD = frozenset("のにをへとや及並、,(（")
+_XREF_HEAD = frozenset("前同次第条規本")
+_OPEN_PARENS = frozenset("（(")
+_CLOSE_PARENS = frozenset("）)")
+# cleanup_extracted_text の最後の整形: 括弧の内側の空白と、条/項/号 と助詞の間の空白を
+# 1回の走査でまとめて取り除く（消すのは空白だけなので先読み・後読みで表す）。
+# 以前の「第 N 条 の」用の置換は、直前の 条/項/号 の置換が同じ空白を先に消すため
+# 一度も効いていなかったので含めていない
+_TIDY_SPACE_RE = re.compile(
+    r"(?<=[（(])\s+"
+    r"|\s+(?=[)）])"
+    r"|(?<=[条項号])\s+(?=[のにをへとや及び並び])"
+)
+
 def cleanup_extracted_text(text: str, url: str = "") -> str:
     """Remove common noise blocks like TOC and internal IDs from ordinance pages.
     Heuristics target g-reiki style pages but are safe generically.
@@ -101,151 +268,118 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
         lines = lines[:cut_idx]
 
     # Remove internal ID-like lines e.g., e000000123
-    id_re = re.compile(r"^[A-Za-z]\d{6,}$")
-    lines = [ln for ln in lines if not id_re.match(ln.strip())]
+    lines = [ln for ln in lines if not _ID_RE.match(ln.strip())]
 
     # Merge common split lines caused by inline markup/newlines
-    def merge_splits(ls):
-        out = []
-        i = 0
+    def merge_splits(ls, start=0):
+        # ls[:start] は前回の走査で結合が起きないと分かっている行なのでそのまま使う
+        out = ls[:start]
+        i = start
         changed = False
-        # Patterns
-        art_header_re = re.compile(r"^\s*第[〇一二三四五六七八九十百千万0-9]+条\s*$")
-        enum_paren_re = re.compile(r"^\s*[（(][0-9０-９一二三四五六七八九十]+[)）]\s*$")
-        enum_numsolo_re = re.compile(r"^\s*[0-9０-９]+\s*$")
-        enum_kata_solo_re = re.compile(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンイロハニホヘトチリヌルヲ]\s*$")
-        enum_kata_end_re = re.compile(r"[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン]$")
-        cross_ref_head_re = re.compile(
-            r"^(?:同条|次条|本条|条例|規則)?第[0-9０-９〇一二三四五六七八九十百千万]+(条|項|号)"
-            r"|^(?:前条|前項|同条|同項|各条|各項)\b"
-        )
-        token_solo_re = re.compile(r"^\s*(前項|同項|前条|同条)\s*$")
-        paren_block_re = re.compile(r"^\s*[（(].*[)）]\s*$")
-        lone_open_re = re.compile(r"^\s*[（(]\s*$")
-        lone_close_re = re.compile(r"^\s*[)）]\s*$")
-        cjk_solo_re = re.compile(r"^\s*[\u4E00-\u9FFF]\s*$")
-        eos_punct = set("。．.？！!？」』)）]")
-        while i < len(ls):
+        n = len(ls)
+        while i < n:
             cur = ls[i]
-            nxt = ls[i+1] if i+1 < len(ls) else None
-            prv = out[-1] if out else None
-            # Join article header line with next
-            if nxt and art_header_re.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone enumerator like (1) with next
-            if nxt and enum_paren_re.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone paragraph number like "2" with next
-            if nxt and enum_numsolo_re.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
-                i += 2
-                changed = True
-                continue
-            # Join standalone katakana enumerator like "ア" with next
-            if nxt and enum_kata_solo_re.match(cur) and nxt.strip():
-                out.append(cur.strip() + " " + nxt.lstrip())
+            # 末尾では nxt を "" とする（規則はすべて nxt の真偽で判定するので None と同じ扱い）
+            nxt = ls[i+1] if i+1 < n else ""
+            # 以下の規則で何度も使う cur の末尾側・nxt の先頭側を1回だけ作る
+            tail = cur.rstrip()
+            head = nxt.lstrip()
+            # Join article header / standalone enumerator like 第1条, (1), "2", "ア" with next
+            if nxt and _HEADER_OR_ENUM_RE.match(cur) and nxt.strip():
+                out.append(cur.strip() + " " + head)
                 i += 2
                 changed = True
                 continue
             # Join cross-reference breaks: prev … 条例\n第11条 / … 同条\n第1項 など
-            if nxt and cross_ref_head_re.match(nxt.strip()):
-                if cur and (cur[-1] not in eos_punct):
-                    out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and _CROSS_REF_HEAD_RE.match(nxt.strip()):
+                if cur and (cur[-1] not in _EOS_PUNCT):
+                    out.append(tail + head)
                     i += 2
                     changed = True
                     continue
             # Join if previous ends with 条/項/号 and next begins with a particle or punctuation
-            if nxt:
-                prev_end = cur.rstrip()[-1:] if cur else ""
-                next_start = nxt.lstrip()[:1]
-                if prev_end in {"条","項","号"} and next_start in {"の","に","を","へ","と","や","及","並","、",",","(","（"}:
-                    out.append(cur.rstrip() + nxt.lstrip())
-                    i += 2
-                    changed = True
-                    continue
+            if nxt and tail[-1:] in _ARTICLE_END_CHARS and head[:1] in _PARTICLE_HEAD:
+                out.append(tail + head)
+                i += 2
+                changed = True
+                continue
             # Join when current line is just a token like 前項/同条
-            if nxt and token_solo_re.match(cur):
-                out.append(cur.strip() + nxt.lstrip())
+            if nxt and _TOKEN_SOLO_RE.match(cur):
+                out.append(cur.strip() + head)
                 i += 2
                 changed = True
                 continue
             # Join parentheses blocks on their own line with previous
-            if paren_block_re.match(cur) and prv:
-                out[-1] = prv.rstrip() + cur.strip()
+            if _PAREN_BLOCK_RE.match(cur) and out and out[-1]:
+                out[-1] = out[-1].rstrip() + cur.strip()
                 i += 1
                 changed = True
                 continue
             # If line ends with an opening parenthesis, join with next
-            if nxt and (cur.rstrip().endswith("（") or cur.rstrip().endswith("(")):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail[-1:] in _OPEN_PARENS:
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If next is a standalone katakana enumerator and current ends with 'から', join
-            if nxt and enum_kata_solo_re.match(nxt) and cur.rstrip().endswith("から"):
-                out.append(cur.rstrip() + nxt.strip())
+            if nxt and tail.endswith("から") and _ENUM_KATA_SOLO_RE.match(nxt):
+                out.append(tail + nxt.strip())
                 i += 2
                 changed = True
                 continue
             # If current ends with katakana enumerator and next starts with 'まで', join
-            if nxt and enum_kata_end_re.search(cur.rstrip()) and nxt.lstrip().startswith("まで"):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail[-1:] in _KATA_END_CHARS and head.startswith("まで"):
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If current ends with katakana enumerator and next starts with 'から', join
-            if nxt and enum_kata_end_re.search(cur.rstrip()) and nxt.lstrip().startswith("から"):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail[-1:] in _KATA_END_CHARS and head.startswith("から"):
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If current ends with '次の' and next starts with katakana enumerator, join
-            if nxt and cur.rstrip().endswith("次の") and (enum_kata_solo_re.match(nxt) or enum_kata_end_re.match(nxt.lstrip()[-1:]) or re.match(r"^\s*[アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲ]", nxt)):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail.endswith("次の") and (_ENUM_KATA_SOLO_RE.match(nxt) or head[-1:] in _KATA_END_CHARS or _NEXT_KATA_PREFIX_RE.match(nxt)):
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If current ends with '、', join with next unless next is a new header/enumerator
-            if nxt and cur.rstrip().endswith("、"):
+            if nxt and tail.endswith("、"):
                 next_stripped = nxt.strip()
-                if not (art_header_re.match(next_stripped) or enum_paren_re.match(next_stripped) or enum_numsolo_re.match(next_stripped) or enum_kata_solo_re.match(next_stripped)):
-                    out.append(cur.rstrip() + next_stripped)
+                if not _HEADER_OR_ENUM_RE.match(next_stripped):
+                    out.append(tail + next_stripped)
                     i += 2
                     changed = True
                     continue
             # If current ends with CJK and next starts with CJK and not sentence end, join
-            if nxt and cur and (cur[-1] not in eos_punct) and re.match(r"[\u4E00-\u9FFF]$", cur[-1]) and re.match(r"^[\u4E00-\u9FFF]", nxt.lstrip()):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and cur and (cur[-1] not in _EOS_PUNCT) and _CJK_SOLO_RE.match(cur[-1]) and _CJK_PREFIX_RE.match(head):
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If next line is a lone closing paren, join
-            if nxt and lone_close_re.match(nxt):
-                out.append(cur.rstrip() + nxt.strip())
+            if nxt and _LONE_CLOSE_RE.match(nxt):
+                out.append(tail + nxt.strip())
                 i += 2
                 changed = True
                 continue
             # If current is a lone opening paren, join with next
-            if nxt and lone_open_re.match(cur):
-                out.append(cur.strip() + nxt.lstrip())
+            if nxt and _LONE_OPEN_RE.match(cur):
+                out.append(cur.strip() + head)
                 i += 2
                 changed = True
                 continue
             # If current ends with closing paren and next starts with 第 (e.g., law article), join
-            if nxt and (cur.rstrip().endswith("）") or cur.rstrip().endswith(")")) and nxt.lstrip().startswith("第"):
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail[-1:] in _CLOSE_PARENS and head.startswith("第"):
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
             # If current ends with '、' and next starts with cross-ref head like 前/同/次/第/条例/規則, join
-            if nxt and cur.rstrip().endswith("、") and nxt.lstrip()[:1] in {"前","同","次","第","条","規","本"}:
-                out.append(cur.rstrip() + nxt.lstrip())
+            if nxt and tail.endswith("、") and head[:1] in _XREF_HEAD:
+                out.append(tail + head)
                 i += 2
                 changed = True
                 continue
@@ -253,10 +387,21 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
             i += 1
         return out, changed
 
-    # Iteratively apply merge until stable
+    # Iteratively apply merge until stable.
+    # 各行の判定は前後1行ずつしか見ないので、前回の走査で最初に変化した行の
+    # 1行手前から再走査すれば全体を走査し直した場合と同じ結果になる
+    start = 0
     changed = True
     while changed:
-        lines, changed = merge_splits(lines)
+        merged, changed = merge_splits(lines, start)
+        if changed:
+            # 変化していない行は同じ文字列オブジェクトのまま out に入る
+            first = start
+            n = min(len(merged), len(lines))
+            while first < n and merged[first] is lines[first]:
+                first += 1
+            start = max(first - 1, 0)
+        lines = merged
 
     # Remove duplicate consecutive empty lines and trim
     cleaned = []
@@ -269,21 +414,87 @@ def cleanup_extracted_text(text: str, url: str = "") -> str:
         prev_empty = is_empty
     text = "\n".join(cleaned).strip()
     # Inline tidy-up: collapse spaces around parentheses and after 条/項/号, and between 第..条 and particles
-    subs = [
-        (r"（\s+", "（"),
-        (r"\s+）", "）"),
-        (r"\(\s+", "("),
-        (r"\s+\)", ")"),
-        (r"(条|項|号)\s+([のにをへとや及び並び])", r"\1\2"),
-        (r"第\s*([0-9０-９〇一二三四五六七八九十百千万]+)\s*条\s+([のにをへとや及び並び])", r"第\1条\2"),
-    ]
-    for pat, rep in subs:
-        text = re.sub(pat, rep, text)
+    text = _TIDY_SPACE_RE.sub("", text)
     return text
 
-def extract_html_text(html_bytes: bytes, url: str) -> str:
+# 文字コード判定: HTTPヘッダ / <meta> の宣言を優先し、なければ本文の先頭から推定する
+_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w\-]+)", re.I)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w\-]+)", re.I)
+# <meta> を探す先頭バイト数と、推定に渡す先頭バイト数
+HEAD_SNIFF_BYTES = 2048
+DETECT_SAMPLE_BYTES = 65536
+
+def charset_from_content_type(content_type: str) -> Optional[str]:
+    """Content-Type ヘッダの charset パラメータを返す（なければ None）"""
+    m = _CHARSET_RE.search(content_type or "")
+    return m.group(1) if m else None
+
+# Python の codecs が知らない別名（WHATWG のラベル）
+_ENCODING_ALIASES = {"x-sjis": "cp932", "windows-31j": "cp932", "x-euc-jp": "euc_jp"}
+# Shift_JIS の宣言は厳密な shift_jis では機種依存文字（①、髙 など）が化けるので、その上位互換の cp932 で読む。
+# EUC-JP 側の NEC/IBM 拡張（cp51932 / eucJP-ms）に当たるコーデックは Python にないので euc_jp のまま
+_SUPERSET_ENCODINGS = {"shift_jis": "cp932"}
+
+def _known_encoding(enc) -> Optional[str]:
+    """宣言・推定された文字コード名を decode に使うコーデック名にする（不明なら None）
+
+    Examples:
+        >>> _known_encoding("Shift_JIS")
+        'cp932'
+        >>> _known_encoding(b"EUC-JP")
+        'euc_jp'
+    """
+    if not enc:
+        return None
+    if isinstance(enc, bytes):
+        enc = enc.decode("ascii", errors="ignore")
+    enc = _ENCODING_ALIASES.get(enc.strip().lower(), enc)
+    try:
+        name = codecs.lookup(enc).name
+    except LookupError:
+        return None
+    return _SUPERSET_ENCODINGS.get(name, name)
+
+def _guess_encoding(sample: bytes) -> Optional[str]:
+    """宣言がないときの推定（先頭 DETECT_SAMPLE_BYTES だけを見る）"""
+    if HAS_CCHARDET:
+        return cchardet.detect(sample).get("encoding")
+    if HAS_CHARSET_NORMALIZER:
+        best = charset_from_bytes(sample).best()
+        return best.encoding if best else None
+    return chardet.detect(sample).get("encoding")
+
+def detect_encoding(html_bytes: bytes, declared_enc: Optional[str] = None) -> str:
+    """Pick the decoding for an HTML body without scanning all of it when possible."""
+    if html_bytes.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    enc = _known_encoding(declared_enc)
+    if enc:
+        return enc
+    m = _META_CHARSET_RE.search(html_bytes, 0, HEAD_SNIFF_BYTES)
+    enc = _known_encoding(m.group(1)) if m else None
+    if enc:
+        return enc
+    try:
+        html_bytes.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        return _known_encoding(_guess_encoding(html_bytes[:DETECT_SAMPLE_BYTES])) or "utf-8"
+    except Exception:
+        return "utf-8"
+
+def make_soup(html: str) -> BeautifulSoup:
+    """BS_PARSER で解析し、失敗したときは html.parser でやり直す"""
+    try:
+        return BeautifulSoup(html, BS_PARSER)
+    except Exception:
+        return BeautifulSoup(html, "html.parser")
+
+def extract_html_text(html_bytes: bytes, url: str, declared_enc: Optional[str] = None) -> str:
     # encoding detection
-    enc = chardet.detect(html_bytes).get("encoding") or "utf-8"
+    enc = detect_encoding(html_bytes, declared_enc)
     html = html_bytes.decode(enc, errors="replace")
 
     if HAS_TRA:
@@ -294,7 +505,7 @@ def extract_html_text(html_bytes: bytes, url: str) -> str:
         except Exception:
             pass
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     for tag in soup(["script","style","noscript","header","footer","nav"]):
         tag.decompose()
     text = soup.get_text("\n")
@@ -304,14 +515,38 @@ def extract_html_text(html_bytes: bytes, url: str) -> str:
     text = "\n".join(lines)
     return normalize_text(text)
 
-def extract_html_text_bs_only(html_bytes: bytes) -> str:
-    """BeautifulSoup-only extractor (bypass Trafilatura)."""
+# 本文に含めない要素（の中のテキスト）。BeautifulSoup 経路で decompose する要素と同じ
+_NOISE_FREE_TEXT_XPATH = (
+    "//text()[not(ancestor::script or ancestor::style or ancestor::noscript"
+    " or ancestor::header or ancestor::footer or ancestor::nav)]"
+)
+
+def _lxml_text_lines(html: str) -> Optional[list]:
+    """lxml だけで get_text("\n") 相当の空でない行を取り出す（解析できなければ None）"""
+    if not HAS_LXML:
+        return None
     try:
-        enc = chardet.detect(html_bytes).get("encoding") or "utf-8"
+        root = lxml.html.document_fromstring(html)
     except Exception:
-        enc = "utf-8"
+        return None
+    lines = [ln.strip() for ln in "\n".join(root.xpath(_NOISE_FREE_TEXT_XPATH)).splitlines()]
+    return [ln for ln in lines if ln]
+
+def extract_html_text_bs_only(html_bytes: bytes, declared_enc: Optional[str] = None) -> str:
+    """BeautifulSoup-only extractor (bypass Trafilatura).
+    lxml があれば BeautifulSoup の木は作らず、同じ結果を lxml の XPath で取り出す。
+
+    Examples:
+        >>> page = "<html><head><meta charset='Shift_JIS'></head><body><p>①② 髙﨑</p></body></html>"
+        >>> extract_html_text_bs_only(page.encode("cp932"))
+        '①② 髙﨑'
+    """
+    enc = detect_encoding(html_bytes, declared_enc)
     html = html_bytes.decode(enc, errors="replace")
-    soup = BeautifulSoup(html, "html.parser")
+    lines = _lxml_text_lines(html)
+    if lines is not None:
+        return normalize_text("\n".join(lines))
+    soup = make_soup(html)
     for tag in soup(["script","style","noscript","header","footer","nav"]):
         tag.decompose()
     text = soup.get_text("\n")
@@ -320,26 +555,31 @@ def extract_html_text_bs_only(html_bytes: bytes) -> str:
     text = "\n".join(lines)
     return normalize_text(text)
 
+PDF_MIN_TEXT_CHARS = 200
+
+def _fitz_text(path: Path) -> Optional[str]:
+    """PyMuPDF でページ順にテキストを取り出す（使えない/失敗したら None）"""
+    if not HAS_FITZ:
+        return None
+    try:
+        with fitz.open(path, filetype="pdf") as doc:
+            return "\n".join(page.get_text("text", sort=True) for page in doc)
+    except Exception:
+        return None
+
 def pdf_text_fast(path: Path) -> str:
-    """Try pdfminer first; if too short, try PyMuPDF blocks with sort."""
+    """Try PyMuPDF first (C library); fall back to pdfminer when it yields too little text."""
+    t2 = _fitz_text(path)
+    if t2 is not None and len(t2.strip()) >= PDF_MIN_TEXT_CHARS:
+        return normalize_text(t2)
     try:
         t = pdf_extract_text(str(path)) or ""
     except Exception:
         t = ""
-    if len(t.strip()) >= 200:
+    if len(t.strip()) >= PDF_MIN_TEXT_CHARS or t2 is None:
         return normalize_text(t)
-    # try PyMuPDF if available
-    if HAS_FITZ:
-        try:
-            doc = fitz.open(path)
-            blocks = []
-            for page in doc:
-                blocks.append(page.get_text("text", sort=True))
-            t2 = "\n".join(blocks)
-            return normalize_text(t2)
-        except Exception:
-            pass
-    return normalize_text(t)
+    # どちらも短い場合は従来どおり PyMuPDF の結果を返す
+    return normalize_text(t2)
 
 def is_scanned_pdf(path: Path, char_threshold=200) -> bool:
     """Heuristic: extract text and count; scanned PDFs usually yield near zero."""
@@ -366,31 +606,49 @@ def run_ocrmypdf(in_pdf: Path, out_pdf: Path, lang="jpn+eng"):
     ]
     subprocess.run(cmd, check=True)
 
-def process_url(url: str, meta: dict, html_completed: set):
+def list_existing_files(*dirs: Path) -> set:
+    """dirs 直下のファイルのパス（OUT_DIR / name と同じ表記の文字列）の集合"""
+    found = set()
+    for d in dirs:
+        with os.scandir(d) as it:
+            found.update(str(d / e.name) for e in it if e.is_file())
+    return found
+
+def process_url(url: str, meta: dict, existing_files: Optional[set] = None, parsed=None):
+    """existing_files: 出力先にあるファイルのパスの集合（list_existing_files）。
+    渡された場合は存在確認をファイルシステムに問い合わせずにこの集合で行い、
+    保存したファイルを追加していく。parsed: 呼び出し側で urlparse(url) 済みならその結果。
+    """
+    if parsed is None:
+        parsed = urlparse(url)  # URL の分解はここで1回だけ行う
+    def exists(path: Path) -> bool:
+        if existing_files is None:
+            return path.exists()
+        return str(path) in existing_files
+
     # Use metadata for better filename
     if "municipality" in meta and "doc_type" in meta:
         municipality_safe = safe_filename(meta["municipality"])
         doc_type_safe = safe_filename(meta["doc_type"])
         fname_base = f"{municipality_safe}_{doc_type_safe}"
     else:
-        fname_base = safe_filename(guess_filename(url))
+        fname_base = safe_filename(guess_filename(url, parsed))
     
-    # Determine if this is a PDF URL
-    r_test, _ = fetch(url)
-    ct = r_test.headers.get("content-type","").split(";")[0].lower()
-    is_pdf = "pdf" in ct or url.lower().endswith(".pdf")
-    
-    if is_pdf:
+    out_pdf = PDF_DIR / f"{fname_base}.pdf"
+    out_txt = OUT_DIR / f"{fname_base}.txt"
+
+    def pdf_skip_record():
+        """PDF を取得しなくてよい場合のレコード（取得する場合は None）"""
         # Check if HTML versions exist for both Ordinance and Regulation
         municipality = meta.get("municipality", "")
         if municipality:
             municipality_safe = safe_filename(municipality)
             ordinance_html = OUT_DIR / f"{municipality_safe}_Ordinance_HTML.txt"
             regulation_html = OUT_DIR / f"{municipality_safe}_Regulation_HTML.txt"
-            
+
             # Skip PDF if both HTML versions exist
-            if ordinance_html.exists() and regulation_html.exists():
-                print(f"    [SKIP] HTML versions exist for {municipality}, skipping PDF")
+            if exists(ordinance_html) and exists(regulation_html):
+                log_line(f"    [SKIP] HTML versions exist for {municipality}, skipping PDF")
                 return {
                     "url": url,
                     "municipality": municipality,
@@ -400,11 +658,10 @@ def process_url(url: str, meta: dict, html_completed: set):
                     "method": "html_exists",
                     "output_pdf": None
                 }
-        
+
         # Check if PDF already downloaded
-        out_pdf = PDF_DIR / f"{fname_base}.pdf"
-        if out_pdf.exists():
-            print(f"    [SKIP] Already exists: {out_pdf}")
+        if exists(out_pdf):
+            log_line(f"    [SKIP] Already exists: {out_pdf}")
             return {
                 "url": url,
                 "municipality": meta.get("municipality", ""),
@@ -414,15 +671,30 @@ def process_url(url: str, meta: dict, html_completed: set):
                 "status": "skipped",
                 "method": "already_exists"
             }
-        
-        # Download PDF
-        r, body = fetch(url)
-        if body is None:
-            r_get = create_session().get(url, timeout=30)
-            body = r_get.content
-        
-        pdf_hash = sha256_of_bytes(body)
-        out_pdf.write_bytes(body)
+        return None
+
+    # 拡張子で PDF と分かる場合は、スキップ判定を先に行い通信しない
+    pdf_by_ext = url.lower().endswith(".pdf")
+    if pdf_by_ext:
+        skipped = pdf_skip_record()
+        if skipped is not None:
+            return skipped
+
+    # 1回の GET（stream=True）で Content-Type を見てから本文の扱いを決める
+    r = fetch_stream(url)
+    ct = r.headers.get("content-type","").split(";")[0].lower()
+    is_pdf = "pdf" in ct or pdf_by_ext
+
+    if is_pdf:
+        skipped = None if pdf_by_ext else pdf_skip_record()
+        if skipped is not None:
+            r.close()
+            return skipped
+
+        # Download PDF (本文はメモリに溜めず、ハッシュを取りながらファイルに書く)
+        pdf_hash = save_stream(r, out_pdf)
+        if existing_files is not None:
+            existing_files.add(str(out_pdf))
         
         now = time.strftime("%Y-%m-%dT%H:%M:%S%z")
         return {
@@ -435,10 +707,10 @@ def process_url(url: str, meta: dict, html_completed: set):
         }
     
     # HTML processing
-    out_txt = OUT_DIR / f"{fname_base}.txt"
     overwrite = os.getenv("OVERWRITE", "0") == "1"
-    if out_txt.exists() and not overwrite:
-        print(f"    [SKIP] Already exists: {out_txt}")
+    if exists(out_txt) and not overwrite:
+        r.close()
+        log_line(f"    [SKIP] Already exists: {out_txt}")
         return {
             "url": url,
             "municipality": meta.get("municipality", ""),
@@ -449,7 +721,7 @@ def process_url(url: str, meta: dict, html_completed: set):
             "method": "already_exists"
         }
     
-    r, body = fetch(url)
+    body = r.content
     now = time.strftime("%Y-%m-%dT%H:%M:%S%z")
     
     record = {
@@ -461,39 +733,38 @@ def process_url(url: str, meta: dict, html_completed: set):
         "output_txt": None,
     }
 
-    if body is None:
-        r_get = create_session().get(url, timeout=30)
-        body = r_get.content
     rec_hash = sha256_of_bytes(body)
     record["bytes_sha256"] = rec_hash
+    declared_enc = charset_from_content_type(r.headers.get("content-type", ""))
     # Choose extraction path
-    netloc = urlparse(url).netloc.lower()
+    netloc = parsed.netloc.lower()
     force_bs = os.getenv("FORCE_BS", "0") == "1"
     force_tra = os.getenv("FORCE_TRA", "0") == "1"
     use_bs = force_bs or (("g-reiki.net" in netloc) and not force_tra)
     if use_bs:
-        text = extract_html_text_bs_only(body)
+        text = extract_html_text_bs_only(body, declared_enc)
         method_used = "beautifulsoup"
     else:
-        text = extract_html_text(body, url)
+        text = extract_html_text(body, url, declared_enc)
         method_used = "trafilatura" if HAS_TRA else "beautifulsoup"
     # Common cleanup
     text = cleanup_extracted_text(text, url)
     out_txt.write_text(text, encoding="utf-8")
+    if existing_files is not None:
+        existing_files.add(str(out_txt))
     record["method"] = method_used
     record["output_txt"] = str(out_txt)
     return record
 
 def get_available_years():
     """利用可能な年別URLファイルのリストを取得"""
-    pattern = "urls_*.csv"
-    files = glob.glob(pattern)
-    years = []
-    for f in files:
-        match = re.search(r'urls_(\d{4})\.csv', f)
-        if match:
-            years.append(match.group(1))
-    return sorted(years)
+    # urls_YYYY.csv は固定長なので、正規表現を使わず名前の形だけで判定する
+    with os.scandir(".") as it:
+        return sorted(
+            e.name[5:9] for e in it
+            if len(e.name) == 13 and e.name.startswith("urls_") and e.name.endswith(".csv")
+            and e.name[5:9].isdigit() and e.is_file()
+        )
 
 def parse_year_range(year_input):
     """年の範囲文字列を解析して年のリストを返す"""
@@ -563,8 +834,33 @@ def get_urls_file_paths(years=None):
     
     return file_paths
 
-def process_single_file(urls_path):
-    """単一のURLファイルを処理"""
+def compact_index_for_resume(index_path: Path) -> set:
+    """index.jsonl に成功・スキップとして記録済みの (url, municipality, doc_type) の集合を返す。
+    あわせて index.jsonl をそれらの行だけに詰め直す。エラーの行はやり直した結果が追記されるので消し、
+    中断で途中までしか書かれなかった行も捨てる（同じURLの行が重ならないようにする）。
+    """
+    done = set()
+    if not index_path.exists():
+        return done
+    kept = []
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if "error" in rec:
+                continue
+            done.add((rec.get("url"), rec.get("municipality"), rec.get("doc_type")))
+            kept.append(line if line.endswith("\n") else line + "\n")
+    tmp = index_path.with_name(index_path.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(kept)
+    os.replace(tmp, index_path)
+    return done
+
+def process_single_file(urls_path, resume=False):
+    """単一のURLファイルを処理（resume=True なら index.jsonl に追記し、記録済みのURLは飛ばす）"""
     global OUT_DIR, PDF_DIR
     
     # ファイル名から年を抽出して出力ディレクトリを設定
@@ -595,39 +891,41 @@ def process_single_file(urls_path):
     os.makedirs(PDF_DIR, exist_ok=True)
     
     # read URLs from CSV with all URL columns
+    # Extract URLs from all URL columns (HTML and PDF)
+    url_columns = [
+        "Ordinance_HTML",
+        "Regulation_HTML",
+        "Ordinance_PDF",
+        "Regulation_PDF"
+    ]
     url_entries = []
     with open(urls_path, newline="", encoding="utf-8") as f:
         # Skip empty lines at the beginning
-        lines = f.readlines()
-        # Find the first non-empty line as header
-        start_idx = 0
-        for i, line in enumerate(lines):
+        # (全行を読み込んで連結し直さず、残りはファイルから直接 csv に流す)
+        head = []
+        for line in f:
             if line.strip():
-                start_idx = i
+                head = [line]
                 break
-        
-        # Create a new reader from the valid lines
-        from io import StringIO
-        valid_csv = "".join(lines[start_idx:])
-        reader = csv.DictReader(StringIO(valid_csv))
-        
-        print(f"CSV Headers: {reader.fieldnames}")
+        reader = csv.reader(chain(head, f))
+        fieldnames = next(reader, None)
+        print(f"CSV Headers: {fieldnames}")
+        # 列名 -> 列番号（同名の列は DictReader と同じく後ろの列を使う）
+        col = {name: i for i, name in enumerate(fieldnames or [])}
+
+        def cell(row, name):
+            i = col.get(name)
+            return row[i] if i is not None and i < len(row) else ""
+
         for row in reader:
-            municipality = row.get("Municipality", "").strip()
-            prefecture = row.get("Prefecture", "").strip()
-            
-            # Extract URLs from all URL columns (HTML and PDF)
-            url_columns = [
-                "Ordinance_HTML",
-                "Regulation_HTML",
-                "Ordinance_PDF",
-                "Regulation_PDF"
-            ]
-            
+            if not row:
+                continue
+            municipality = cell(row, "Municipality").strip()
+            prefecture = cell(row, "Prefecture").strip()
+
             for col_name in url_columns:
-                url = row.get(col_name) or ""
-                url = url.strip().strip('"')
-                
+                url = cell(row, col_name).strip().strip('"')
+
                 if url and url.startswith("http"):
                     url_entries.append({
                         "url": url,
@@ -637,70 +935,101 @@ def process_single_file(urls_path):
                     })
 
     print(f"Total URLs found: {len(url_entries)}")
+
+    if resume:
+        done = compact_index_for_resume(index_path)
+        if done:
+            url_entries = [
+                e for e in url_entries
+                if (e["url"], e["municipality"], e["doc_type"]) not in done
+            ]
+            print(f"Resume: {len(done)} entries already in {index_path}, {len(url_entries)} remaining")
     
-    # Build set of municipalities that have HTML completed
-    html_completed = set()
+    # 出力先のファイル一覧は最初に1回だけ読み、以降は保存のたびに追加していく
+    existing_files = list_existing_files(OUT_DIR, PDF_DIR)
     
-    meta = {}
-    results = []
+    written = 0
     total = len(url_entries)
     success_count = 0
     skip_count = 0
     error_count = 0
-    
+
+    # URLごとの処理は並列に行う。ただし PDF は同じ自治体の HTML が保存済みかを見て
+    # スキップするので、HTML 列をすべて処理してから PDF 列に進む。同じ出力ファイルに
+    # なる重複行は、先の行が終わってから次の段で処理する（逐次処理と同じ結果になる）
+    waves = {}
+    seen = Counter()
     for idx, entry in enumerate(url_entries, 1):
-        url = entry["url"]
-        try:
-            # Pass metadata to process_url
-            meta_info = {
-                "municipality": entry["municipality"],
-                "prefecture": entry["prefecture"],
-                "doc_type": entry["doc_type"]
-            }
-            rec = process_url(url, meta_info, html_completed)
-            # Add metadata to record
-            rec["municipality"] = entry["municipality"]
-            rec["prefecture"] = entry["prefecture"]
-            rec["doc_type"] = entry["doc_type"]
-            results.append(rec)
-            
-            if rec.get("status") == "skipped":
-                skip_count += 1
-                skip_reason = rec.get("method", "already_exists")
-                if skip_reason == "html_exists":
-                    print(f"[{idx}/{total}] [SKIP] {entry['municipality']} ({entry['doc_type']}) -> HTML versions exist")
-                else:
-                    print(f"[{idx}/{total}] [SKIP] {entry['municipality']} ({entry['doc_type']}) -> Already exists")
-            else:
-                success_count += 1
-                output_file = rec.get('output_pdf') or rec.get('output_txt', 'N/A')
-                print(f"[{idx}/{total}] [OK] {entry['municipality']} ({entry['doc_type']}) -> {output_file} ({rec['method']})")
-        except Exception as e:
-            error_count += 1
-            print(f"[{idx}/{total}] [ERR] {entry['municipality']} ({entry['doc_type']}) {url} -> {e}")
-            results.append({
-                "url": url,
-                "municipality": entry["municipality"],
-                "prefecture": entry["prefecture"],
-                "doc_type": entry["doc_type"],
-                "error": str(e)
-            })
-
-    with open(index_path, "w", encoding="utf-8") as w:
-        for rec in results:
-            w.write(json.dumps(rec, ensure_ascii=False) + "\n")
-    
+        key = (entry["municipality"], entry["doc_type"])
+        is_pdf_col = entry["doc_type"].endswith("_PDF")
+        parsed = urlparse(entry["url"])  # URL の分解はエントリごとに1回だけ行う
+        waves.setdefault((is_pdf_col, seen[key]), []).append((idx, entry, parsed))
+        seen[key] += 1
+
+    def run_entry(entry, parsed):
+        meta_info = {
+            "municipality": entry["municipality"],
+            "prefecture": entry["prefecture"],
+            "doc_type": entry["doc_type"]
+        }
+        return process_url(entry["url"], meta_info, existing_files, parsed)
+
+    workers = max(1, int(os.getenv("WORKERS", str(DEFAULT_WORKERS))))
+    # 結果は1件ずつ index.jsonl に書き、INDEX_FLUSH_RECORDS 件ごとに flush する
+    # （強制終了しても、最後に flush した分までは --resume で飛ばせる）
+    index_mode = "a" if resume else "w"
+    with open(index_path, index_mode, encoding="utf-8", buffering=1 << 20) as index_fp, \
+            ThreadPoolExecutor(max_workers=workers) as ex:
+        for wave_key in sorted(waves):
+            # ひとつの自治体のサーバーに接続が集中しないよう、ホストごとに同時接続数を絞って投入し、
+            # 完了した順に結果を記録する
+            for future, idx, entry in run_by_host(ex, waves[wave_key], run_entry, workers):
+                url = entry["url"]
+                try:
+                    rec = future.result()
+                    # Add metadata to record
+                    rec["municipality"] = entry["municipality"]
+                    rec["prefecture"] = entry["prefecture"]
+                    rec["doc_type"] = entry["doc_type"]
+                    index_fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    written += 1
+
+                    if rec.get("status") == "skipped":
+                        skip_count += 1
+                        skip_reason = rec.get("method", "already_exists")
+                        if skip_reason == "html_exists":
+                            log_line(f"[{idx}/{total}] [SKIP] {entry['municipality']} ({entry['doc_type']}) -> HTML versions exist")
+                        else:
+                            log_line(f"[{idx}/{total}] [SKIP] {entry['municipality']} ({entry['doc_type']}) -> Already exists")
+                    else:
+                        success_count += 1
+                        output_file = rec.get('output_pdf') or rec.get('output_txt', 'N/A')
+                        log_line(f"[{idx}/{total}] [OK] {entry['municipality']} ({entry['doc_type']}) -> {output_file} ({rec['method']})")
+                except Exception as e:
+                    error_count += 1
+                    log_line(f"[{idx}/{total}] [ERR] {entry['municipality']} ({entry['doc_type']}) {url} -> {e}")
+                    index_fp.write(json.dumps({
+                        "url": url,
+                        "municipality": entry["municipality"],
+                        "prefecture": entry["prefecture"],
+                        "doc_type": entry["doc_type"],
+                        "error": str(e)
+                    }, ensure_ascii=False) + "\n")
+                    written += 1
+                if written % INDEX_FLUSH_RECORDS == 0:
+                    index_fp.flush()
+
     print(f"\nCompleted processing {urls_path}")
     print(f"  Success: {success_count}")
     print(f"  Skipped: {skip_count}")
     print(f"  Errors:  {error_count}")
     print(f"  Results saved to: {index_path}")
     
-    return success_count, skip_count, error_count, len(results)
+    return success_count, skip_count, error_count, written
 
 
 
-def main(urls_path=None, year_input=None):
+def main(urls_path=None, year_input=None, resume=False):
     """メイン処理関数"""
     print(f"Starting web_fetch.py...")
     
@@ -720,7 +1049,7 @@ def main(urls_path=None, year_input=None):
     total_urls = 0
     
     for file_path in file_paths:
-        success, skip, error, urls = process_single_file(file_path)
+        success, skip, error, urls = process_single_file(file_path, resume=resume)
         total_success += success
         total_skip += skip
         total_error += error
@@ -749,11 +1078,13 @@ if __name__ == "__main__":
   python web_fetch.py -y 2016-2017       # 2016年と2017年を処理
   python web_fetch.py --list-years       # 利用可能な年のリストを表示
   python web_fetch.py --urls-file custom.csv  # カスタムファイルを指定
+  python web_fetch.py -y 2015 --resume  # 中断した処理の続きから（index.jsonl に追記）
         """
     )
     parser.add_argument("--year", "-y", type=str, help="処理対象の年（例: 2014, 2015, 2014-2018）")
     parser.add_argument("--list-years", "-l", action="store_true", help="利用可能な年のリストを表示")
     parser.add_argument("--urls-file", type=str, help="URLファイルのパス（手動指定）")
+    parser.add_argument("--resume", action="store_true", help="index.jsonl に記録済みのURLを飛ばし、結果を追記する（エラーの行は消してやり直す）")
     
     args = parser.parse_args()
     
@@ -767,4 +1098,4 @@ if __name__ == "__main__":
             print("年別URLファイルが見つかりません。")
         sys.exit(0)
     
-    main(urls_path=args.urls_file, year_input=args.year)
+    main(urls_path=args.urls_file, year_input=args.year, resume=args.resume)